@@ -152,7 +152,7 @@ class GrantAgentPermissionView(APIView):
         
         try:
             agent = Agent.objects.get(id=agent_id, is_active=True)
-            permission = Permission.objects.get(key=permission_key)
+            permission = Permission.get_by_key(permission_key)
             
             # Grant permission
             agent_perm = AgentPermissions.grant_permission(
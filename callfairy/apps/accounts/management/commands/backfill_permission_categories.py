@@ -0,0 +1,32 @@
+"""
+Management command to store the category on permissions saved before it existed.
+
+Rows created before Permission.category was added hold the default
+category until re-saved; run this once after migrating.
+
+Usage:
+    python manage.py backfill_permission_categories
+"""
+
+from django.core.management.base import BaseCommand
+from callfairy.apps.accounts.models import Permission
+from callfairy.apps.accounts.utils import invalidate_permission_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the stored category of every permission from its key'
+
+    def handle(self, *args, **options):
+        stale = []
+        for permission in Permission.objects.only('id', 'key', 'category'):
+            category = Permission.category_for_key(permission.key)
+            if permission.category != category:
+                permission.category = category
+                stale.append(permission)
+
+        # bulk_update skips post_save, so clear what its receivers would have
+        Permission.objects.bulk_update(stale, ['category'], batch_size=500)
+        Permission.clear_cache()
+        invalidate_permission_summaries()
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Updated the category of {len(stale)} permissions'))
@@ -1,9 +1,12 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.password_validation import validate_password
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.text import slugify
+from django.utils.functional import cached_property
 import uuid
 import secrets
 from datetime import timedelta
@@ -111,27 +114,34 @@ class User(AbstractBaseUser, PermissionsMixin):
     
     # ============ AGENT & PERMISSION METHODS ============
     
+    @cached_property
+    def _active_agent(self):
+        """Active agent assignment (with organisation), fetched once per instance."""
+        return self.agent_assignments.select_related('organisation').filter(is_active=True).first()
+    
+    def clear_agent_cache(self):
+        """Drop the cached agent assignment so the next check hits the database."""
+        self.__dict__.pop('_active_agent', None)
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.clear_agent_cache()
+    
     def is_agent(self):
         """Check if this user is an agent for any organisation."""
-        return hasattr(self, '_is_agent_cache') and self._is_agent_cache or \
-               Agent.objects.filter(user=self, is_active=True).exists()
+        return self._active_agent is not None
     
     def get_managed_organisation(self):
         """Get the organisation this user manages (if they're an agent)."""
-        if not self.is_agent():
-            return None
-        agent = Agent.objects.filter(user=self, is_active=True).first()
+        agent = self._active_agent
         return agent.organisation if agent else None
     
     def get_agent_permissions(self):
         """Get all permissions this user has as an agent."""
-        if not self.is_agent():
-            return Permission.objects.none()
-        try:
-            agent = Agent.objects.get(user=self, is_active=True)
-            return Permission.objects.filter(agentpermissions__agent=agent)
-        except Agent.DoesNotExist:
+        agent = self._active_agent
+        if agent is None:
             return Permission.objects.none()
+        return Permission.objects.filter(agentpermissions__agent=agent)
     
     def get_direct_permissions(self):
         """Get all direct permissions assigned to this user."""
@@ -158,6 +168,7 @@ class User(AbstractBaseUser, PermissionsMixin):
         - If user is an agent and not superuser, upgrade to superuser
         - If user is not an agent but is superuser, downgrade to user
         """
+        self.clear_agent_cache()
         is_agent_now = self.is_agent()
         
         if is_agent_now and self.role != 'superuser':
@@ -196,6 +207,9 @@ class EmailVerificationToken(models.Model):
 class AllowedEmailDomain(models.Model):
     """Whitelist of email domains allowed to authenticate (optional global restriction)."""
 
+    CACHE_KEY = 'accounts:allowed_domains'
+    CACHE_TTL = 300  # seconds
+
     domain = models.CharField(max_length=255, unique=True)
     is_active = models.BooleanField(default=True)
 
@@ -206,6 +220,23 @@ class AllowedEmailDomain(models.Model):
     def __str__(self):
         return f"{self.domain} ({'active' if self.is_active else 'inactive'})"
 
+    @classmethod
+    def get_active_domains(cls) -> frozenset:
+        """Lowercased active domains, cached for CACHE_TTL seconds (empty set = no restriction)."""
+        return cache.get_or_set(
+            cls.CACHE_KEY,
+            lambda: frozenset(
+                cls.objects.filter(is_active=True)
+                .annotate(domain_lower=Lower('domain'))
+                .values_list('domain_lower', flat=True)
+            ),
+            cls.CACHE_TTL,
+        )
+
+    @classmethod
+    def clear_cache(cls):
+        cache.delete(cls.CACHE_KEY)
+
 
 class GoogleSignInAudit(models.Model):
     """Audit log for Google sign-in attempts."""
@@ -261,12 +292,34 @@ class UserOrganisation(models.Model):
 
 class Permission(models.Model):
     """Defines a specific permission that can be granted to users or agents."""
+    
+    # Ordered (key substrings, category) rules; the first match wins
+    CATEGORY_RULES = (
+        (('user',), 'Users'),
+        (('organisation',), 'Organisations'),
+        (('report', 'analytics'), 'Reports'),
+        (('call', 'campaign'), 'Calls'),
+        (('contact',), 'Contacts'),
+    )
+    DEFAULT_CATEGORY = 'System'
+    # Display order of the categories: rule order, then the default
+    CATEGORY_ORDER = tuple(category for _, category in CATEGORY_RULES) + (DEFAULT_CATEGORY,)
+    
+    CACHE_KEY = 'accounts:permissions_by_key'
+    CACHE_TTL = 300  # seconds
+    
     name = models.CharField(max_length=255, help_text="Human-readable permission name")
     key = models.SlugField(
         max_length=255, 
         unique=True, 
         help_text="Unique permission key (e.g., 'view_reports')"
     )
+    category = models.CharField(
+        max_length=50,
+        default=DEFAULT_CATEGORY,
+        editable=False,
+        help_text="Display category derived from the key on save"
+    )
     description = models.TextField(blank=True, help_text="What this permission allows")
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -274,10 +327,48 @@ class Permission(models.Model):
         verbose_name = "Permission"
         verbose_name_plural = "Permissions"
         ordering = ['name']
+        indexes = [models.Index(fields=['category', 'key'])]
+    
+    @classmethod
+    def category_for_key(cls, key):
+        """Classify a permission key into its display category."""
+        for needles, category in cls.CATEGORY_RULES:
+            if any(needle in key for needle in needles):
+                return category
+        return cls.DEFAULT_CATEGORY
+    
+    @classmethod
+    def get_by_key(cls, key):
+        """
+        Look up a permission by key from the cached {key: Permission} map.
+        
+        The map lives in the shared Redis cache (settings.CACHES), so the
+        clear_cache() run by the post_save/post_delete receivers reaches every
+        process. Writes that skip those signals (bulk_create, bulk_update,
+        queryset update) must call clear_cache() themselves, or lookups may
+        be stale for up to CACHE_TTL seconds.
+        
+        Raises:
+            Permission.DoesNotExist: If no permission has this key
+        """
+        permissions = cache.get_or_set(
+            cls.CACHE_KEY,
+            lambda: {permission.key: permission for permission in cls.objects.all()},
+            cls.CACHE_TTL,
+        )
+        try:
+            return permissions[key]
+        except KeyError:
+            raise cls.DoesNotExist(f"Permission with key '{key}' does not exist.") from None
+    
+    @classmethod
+    def clear_cache(cls):
+        cache.delete(cls.CACHE_KEY)
     
     def save(self, *args, **kwargs):
         if not self.key:
             self.key = slugify(self.name)
+        self.category = self.category_for_key(self.key)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -351,6 +442,7 @@ class Agent(models.Model):
         indexes = [
             models.Index(fields=['user', 'is_active']),
             models.Index(fields=['organisation', 'is_active']),
+            models.Index(fields=['is_active', '-assigned_at']),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -414,6 +506,7 @@ class Agent(models.Model):
         # Update user role to superuser
         user.role = 'superuser'
         user.save(update_fields=['role'])
+        user.clear_agent_cache()
         
         return new_agent
     
@@ -502,7 +595,7 @@ class AgentPermissions(models.Model):
             AgentPermissions: The created permission grant
         """
         if isinstance(permission, str):
-            permission = Permission.objects.get(key=permission)
+            permission = Permission.get_by_key(permission)
         
         agent_perm, created = cls.objects.get_or_create(
             agent=agent,
@@ -521,7 +614,7 @@ class AgentPermissions(models.Model):
             permission: Permission instance or permission key
         """
         if isinstance(permission, str):
-            permission = Permission.objects.get(key=permission)
+            permission = Permission.get_by_key(permission)
         
         cls.objects.filter(agent=agent, permission=permission).delete()
     
@@ -1,3 +1,5 @@
+from operator import attrgetter
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model, authenticate
 from django.contrib.auth.password_validation import validate_password
@@ -118,7 +120,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
 
 class EmailVerificationSerializer(serializers.Serializer):
-    token = serializers.CharField()
+    # Bounded to the column size so oversized input is rejected before the lookup
+    token = serializers.CharField(max_length=128)
 
     def validate(self, attrs):
         token = attrs.get('token')
@@ -243,7 +246,12 @@ class OrganisationSerializer(serializers.ModelSerializer):
     
     def get_agent(self, obj):
         """Get the agent for this organisation."""
-        agent = Agent.get_agent_for_organisation(obj)
+        active_agents = getattr(obj, 'active_agents', None)
+        if active_agents is not None:
+            # Prefetched via utils.with_active_agent()
+            agent = active_agents[0] if active_agents else None
+        else:
+            agent = Agent.get_agent_for_organisation(obj)
         if agent:
             return {
                 'id': str(agent.user.id),
@@ -282,7 +290,12 @@ class AgentSerializer(serializers.ModelSerializer):
     
     def get_permissions(self, obj):
         """Get all permissions for this agent."""
-        perms = obj.get_permissions()
+        grants = getattr(obj, 'permission_grants', None)
+        if grants is not None:
+            # Prefetched by the view; match Permission's default name ordering
+            perms = sorted((grant.permission for grant in grants), key=attrgetter('name'))
+        else:
+            perms = obj.get_permissions()
         return PermissionSerializer(perms, many=True).data
 
 
@@ -323,7 +336,7 @@ class GrantAgentPermissionSerializer(serializers.Serializer):
     def validate_permission_key(self, value):
         """Validate permission exists."""
         try:
-            permission = Permission.objects.get(key=value)
+            permission = Permission.get_by_key(value)
             return permission
         except Permission.DoesNotExist:
             raise serializers.ValidationError('Permission not found')
@@ -357,25 +370,41 @@ class UserDetailSerializer(UserSerializer):
             'all_permissions', 'accessible_organisations'
         )
     
+    def _permission_sets(self, obj):
+        """
+        Fetch direct and agent permissions once per user and derive the union in memory.
+        
+        Returns:
+            tuple: (direct, agent, all) lists of Permission, each ordered by name
+        """
+        cache = self.__dict__.setdefault('_permission_sets_cache', {})
+        if obj.pk not in cache:
+            direct = list(obj.get_direct_permissions())
+            agent = list(obj.get_agent_permissions()) if obj.is_agent() else []
+            combined = {perm.pk: perm for perm in direct + agent}
+            cache[obj.pk] = (direct, agent, sorted(combined.values(), key=attrgetter('name')))
+        return cache[obj.pk]
+    
+    def get_permissions(self, obj):
+        """Get all permission keys for this user."""
+        if self.context.get('include_permissions', False):
+            return [perm.key for perm in self._permission_sets(obj)[2]]
+        return []
+    
     def get_direct_permissions(self, obj):
         """Get direct permissions."""
-        perms = obj.get_direct_permissions()
-        return PermissionSerializer(perms, many=True).data
+        return PermissionSerializer(self._permission_sets(obj)[0], many=True).data
     
     def get_agent_permissions(self, obj):
         """Get agent permissions."""
-        if not obj.is_agent():
-            return []
-        perms = obj.get_agent_permissions()
-        return PermissionSerializer(perms, many=True).data
+        return PermissionSerializer(self._permission_sets(obj)[1], many=True).data
     
     def get_all_permissions(self, obj):
         """Get all permissions combined."""
-        perms = obj.get_all_permissions()
-        return PermissionSerializer(perms, many=True).data
+        return PermissionSerializer(self._permission_sets(obj)[2], many=True).data
     
     def get_accessible_organisations(self, obj):
         """Get organisations user can access."""
-        from .utils import get_user_accessible_organisations
-        orgs = get_user_accessible_organisations(obj)
+        from .utils import get_user_accessible_organisations, with_active_agent
+        orgs = with_active_agent(get_user_accessible_organisations(obj))
         return OrganisationSerializer(orgs, many=True, context=self.context).data
@@ -7,7 +7,16 @@ Handles automatic updates when agents are assigned/revoked.
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import Agent, User
+from .models import (
+    Agent,
+    AgentPermissions,
+    AllowedEmailDomain,
+    Organisation,
+    Permission,
+    User,
+    UserPermissionAccess,
+)
+from .utils import invalidate_permission_summaries, invalidate_permission_summary
 import logging
 
 logger = logging.getLogger(__name__)
@@ -89,6 +98,39 @@ def sync_user_role_on_agent_delete(sender, instance, **kwargs):
         )
 
 
+@receiver(post_save, sender=AllowedEmailDomain)
+@receiver(post_delete, sender=AllowedEmailDomain)
+def invalidate_allowed_domains_cache(sender, **kwargs):
+    """Drop the cached domain whitelist so the next sign-in sees the change."""
+    AllowedEmailDomain.clear_cache()
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_permission_lookup_cache(sender, **kwargs):
+    """Drop the cached key -> Permission map so lookups see the change."""
+    Permission.clear_cache()
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_permission_summary_cache(sender, instance, update_fields=None, **kwargs):
+    """Drop the changed user's cached summary; no other user's summary reads their row."""
+    # Session logins only write last_login, which the summary does not include
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    invalidate_permission_summary(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Agent)
+@receiver([post_save, post_delete], sender=AgentPermissions)
+@receiver([post_save, post_delete], sender=UserPermissionAccess)
+@receiver([post_save, post_delete], sender=Organisation)
+@receiver([post_save, post_delete], sender=Permission)
+def invalidate_permission_summary_cache(sender, **kwargs):
+    """Retire cached permission summaries when anything they are built from changes."""
+    invalidate_permission_summaries()
+
+
 # Optional: Add audit logging signals
 
 @receiver(post_save, sender=Agent)
@@ -6,6 +6,8 @@ from django.core.mail import send_mail
 from django.conf import settings
 import logging
 
+from .models import GoogleSignInAudit
+
 logger = logging.getLogger(__name__)
 
 
@@ -148,3 +150,14 @@ CallFairy Team'''
     except Exception as e:
         logger.error(f"Error sending welcome email to {user_email}: {str(e)}")
         return {'status': 'error', 'message': str(e)}
+
+
+@shared_task(ignore_result=True)
+def record_google_signin_audit(**fields):
+    """
+    Persist a GoogleSignInAudit row queued by GoogleLoginView.
+    
+    Args:
+        **fields: GoogleSignInAudit field values (user passed as ``user_id``)
+    """
+    GoogleSignInAudit.objects.create(**fields)
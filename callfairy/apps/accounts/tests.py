@@ -5,7 +5,9 @@ from django.contrib.auth import get_user_model
 from django_otp.plugins.otp_totp.models import TOTPDevice
 from unittest.mock import patch, Mock
 from callfairy.apps.accounts.models import AllowedEmailDomain, GoogleSignInAudit
+from callfairy.apps.accounts.tasks import record_google_signin_audit
 from django.test import override_settings
+from django.core.cache import cache
 
 
 User = get_user_model()
@@ -13,6 +15,15 @@ User = get_user_model()
 
 class AccountsFlowTests(APITestCase):
     def setUp(self):
+        # Cached domain whitelist must not leak between tests
+        cache.clear()
+        # Run queued audit writes inline so tests can assert on them
+        audit_patcher = patch(
+            'callfairy.apps.accounts.views.record_google_signin_audit.delay',
+            side_effect=lambda **fields: record_google_signin_audit(**fields),
+        )
+        audit_patcher.start()
+        self.addCleanup(audit_patcher.stop)
         self.register_url = reverse('accounts:register')
         self.login_url = reverse('accounts:login')
         self.refresh_url = reverse('accounts:token_refresh')
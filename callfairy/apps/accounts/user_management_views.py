@@ -3,15 +3,30 @@ User Management Template Views
 Django template-based views for managing users, organisations, agents, and permissions
 """
 
+import csv
+from itertools import chain, groupby
+from operator import attrgetter
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Count
-from django.http import JsonResponse
+from django.db.models import Q, Count, OuterRef, Subquery
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 
 from .models import User, Organisation, Agent, Permission, AgentPermissions, UserOrganisation
-from .utils import get_user_accessible_organisations, can_user_manage_organisation
+from .utils import (
+    get_user_accessible_organisations,
+    can_user_manage_organisation,
+    invalidate_permission_summaries,
+)
+
+
+# Editable Organisation fields submitted by the create/edit forms
+ORGANISATION_FIELDS = ('name', 'description', 'address', 'city', 'state', 'country', 'pincode')
+
+# Rows fetched per server-side cursor round-trip when streaming exports
+EXPORT_CHUNK_SIZE = 500
 
 
 # ============= UTILITY FUNCTIONS =============
@@ -26,6 +41,17 @@ def require_superadmin(view_func):
     return wrapper
 
 
+def _grant_agent_permissions(agent, permission_keys):
+    """Grant the given permission keys to an agent, skipping keys not seeded in the DB."""
+    permissions = Permission.objects.filter(key__in=permission_keys)
+    AgentPermissions.objects.bulk_create(
+        [AgentPermissions(agent=agent, permission=permission) for permission in permissions],
+        ignore_conflicts=True,
+    )
+    # bulk_create sends no post_save signals
+    invalidate_permission_summaries()
+
+
 def grant_basic_agent_permissions(agent):
     """Grant basic agent permissions (view-only)"""
     basic_permissions = [
@@ -33,15 +59,7 @@ def grant_basic_agent_permissions(agent):
         'view_users',
         'view_reports',
     ]
-    for perm_key in basic_permissions:
-        try:
-            permission = Permission.objects.get(key=perm_key)
-            AgentPermissions.objects.get_or_create(
-                agent=agent,
-                permission=permission
-            )
-        except Permission.DoesNotExist:
-            pass
+    _grant_agent_permissions(agent, basic_permissions)
 
 
 def grant_standard_agent_permissions(agent):
@@ -54,15 +72,7 @@ def grant_standard_agent_permissions(agent):
         'view_calls',
         'create_contacts',
     ]
-    for perm_key in standard_permissions:
-        try:
-            permission = Permission.objects.get(key=perm_key)
-            AgentPermissions.objects.get_or_create(
-                agent=agent,
-                permission=permission
-            )
-        except Permission.DoesNotExist:
-            pass
+    _grant_agent_permissions(agent, standard_permissions)
 
 
 def grant_advanced_agent_permissions(agent):
@@ -79,15 +89,40 @@ def grant_advanced_agent_permissions(agent):
         'make_calls',
         'manage_campaigns',
     ]
-    for perm_key in advanced_permissions:
-        try:
-            permission = Permission.objects.get(key=perm_key)
-            AgentPermissions.objects.get_or_create(
-                agent=agent,
-                permission=permission
-            )
-        except Permission.DoesNotExist:
-            pass
+    _grant_agent_permissions(agent, advanced_permissions)
+
+
+class Echo:
+    """File-like object whose write() hands back the value, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def group_permissions_by_category(permissions):
+    """
+    Group permissions ordered by (category, key) into {category: [permissions]}.
+    
+    Categories come out in Permission.CATEGORY_ORDER rather than the
+    alphabetical order the rows are sorted in.
+    """
+    groups = {
+        category: list(perms)
+        for category, perms in groupby(permissions, key=attrgetter('category'))
+    }
+    rank = {category: index for index, category in enumerate(Permission.CATEGORY_ORDER)}
+    return dict(sorted(groups.items(), key=lambda item: rank.get(item[0], len(rank))))
+
+
+def stream_csv_response(filename, header, rows):
+    """Stream rows as a CSV attachment without building the file in memory."""
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in chain([header], rows)),
+        content_type='text/csv',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 
 # ============= ORGANISATION MANAGEMENT =============
@@ -175,14 +210,12 @@ def organisation_edit_view(request, org_id):
         return redirect('organisation_detail', org_id=org_id)
     
     if request.method == 'POST':
-        organisation.name = request.POST.get('name', organisation.name)
-        organisation.description = request.POST.get('description', '')
-        organisation.address = request.POST.get('address', '')
-        organisation.city = request.POST.get('city', '')
-        organisation.state = request.POST.get('state', '')
-        organisation.country = request.POST.get('country', '')
-        organisation.pincode = request.POST.get('pincode', '')
-        organisation.save()
+        fields = {
+            field: request.POST.get(field, getattr(organisation, field))
+            for field in ORGANISATION_FIELDS
+        }
+        Organisation.objects.filter(pk=organisation.pk).update(**fields)
+        invalidate_permission_summaries()
         
         messages.success(request, 'Organisation updated successfully!')
         return redirect('organisation_detail', org_id=org_id)
@@ -198,22 +231,13 @@ def organisation_edit_view(request, org_id):
 def organisation_create_view(request):
     """Create new organisation (SuperAdmin only)"""
     if request.method == 'POST':
-        name = request.POST.get('name')
-        description = request.POST.get('description', '')
-        city = request.POST.get('city', '')
+        fields = {field: request.POST.get(field, '') for field in ORGANISATION_FIELDS}
+        name = fields['name']
         
         if not name:
             messages.error(request, 'Organisation name is required.')
         else:
-            organisation = Organisation.objects.create(
-                name=name,
-                description=description,
-                city=city,
-                address=request.POST.get('address', ''),
-                state=request.POST.get('state', ''),
-                country=request.POST.get('country', ''),
-                pincode=request.POST.get('pincode', ''),
-            )
+            organisation = Organisation.objects.create(**fields)
             messages.success(request, f'Organisation "{name}" created successfully!')
             return redirect('organisation_detail', org_id=organisation.id)
     
@@ -228,6 +252,16 @@ def agents_list_view(request):
     """List all agents (SuperAdmin only)"""
     agents = Agent.objects.filter(is_active=True).select_related('user', 'organisation', 'assigned_by')
     
+    if request.GET.get('format') == 'csv':
+        rows = agents.values_list(
+            'user__email', 'user__name', 'organisation__name', 'assigned_at', 'assigned_by__email'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        return stream_csv_response(
+            'agents.csv',
+            ['email', 'name', 'organisation', 'assigned_at', 'assigned_by'],
+            rows,
+        )
+    
     # Get agent permissions
     for agent in agents:
         agent.permission_list = agent.get_permissions()
@@ -253,8 +287,10 @@ def agent_assign_view(request):
             organisation = Organisation.objects.get(id=org_id)
             
             # Check if user is already an agent elsewhere
-            existing_agent = Agent.get_agent_for_user(user)
-            if existing_agent and existing_agent.is_active and existing_agent.organisation.id != organisation.id:
+            existing_agent = Agent.objects.select_related('organisation').filter(
+                user=user, is_active=True
+            ).first()
+            if existing_agent and existing_agent.organisation_id != organisation.id:
                 messages.error(request, f'{user.name} is already an agent for {existing_agent.organisation.name}')
                 return redirect('agent_assign')
             
@@ -327,7 +363,7 @@ def agent_permissions_view(request, agent_id):
         permission_key = request.POST.get('permission_key')
         
         try:
-            permission = Permission.objects.get(key=permission_key)
+            permission = Permission.get_by_key(permission_key)
             
             if action == 'grant':
                 AgentPermissions.objects.get_or_create(agent=agent, permission=permission)
@@ -343,34 +379,20 @@ def agent_permissions_view(request, agent_id):
     current_permissions = agent.get_permissions()
     current_perm_keys = set(current_permissions.values_list('key', flat=True))
     
-    # Get all permissions grouped by category
-    all_permissions = Permission.objects.all().order_by('key')
-    
-    # Group permissions
-    permission_groups = {}
-    for perm in all_permissions:
-        category = perm.key.split('_')[-1]  # Simplified grouping
-        if 'user' in perm.key:
-            category = 'Users'
-        elif 'organisation' in perm.key:
-            category = 'Organisations'
-        elif 'report' in perm.key or 'analytics' in perm.key:
-            category = 'Reports'
-        elif 'call' in perm.key or 'campaign' in perm.key:
-            category = 'Calls'
-        elif 'contact' in perm.key:
-            category = 'Contacts'
-        else:
-            category = 'System'
-        
-        if category not in permission_groups:
-            permission_groups[category] = []
-        
-        permission_groups[category].append({
-            'permission': perm,
-            'has_permission': perm.key in current_perm_keys,
-            'is_system': category == 'System',
-        })
+    # Get all permissions grouped by their stored category
+    all_permissions = Permission.objects.all().order_by('category', 'key')
+    
+    permission_groups = {
+        category: [
+            {
+                'permission': perm,
+                'has_permission': perm.key in current_perm_keys,
+                'is_system': category == Permission.DEFAULT_CATEGORY,
+            }
+            for perm in perms
+        ]
+        for category, perms in group_permissions_by_category(all_permissions).items()
+    }
     
     context = {
         'agent': agent,
@@ -388,18 +410,38 @@ def system_users_list_view(request):
     """List all users in the system (SuperAdmin only)"""
     users = User.objects.all().order_by('-date_joined')
     
+    if request.GET.get('format') == 'csv':
+        managed_org_name = Agent.objects.filter(
+            user=OuterRef('pk'), is_active=True
+        ).values('organisation__name')[:1]
+        rows = users.annotate(managed_organisation=Subquery(managed_org_name)).values_list(
+            'email', 'name', 'role', 'is_active', 'date_joined', 'managed_organisation'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        return stream_csv_response(
+            'users.csv',
+            ['email', 'name', 'role', 'is_active', 'date_joined', 'managed_organisation'],
+            rows,
+        )
+    
     # Add agent info
     for user in users:
         user.is_active_agent = user.is_agent()
         if user.is_active_agent:
             user.managed_org = user.get_managed_organisation()
-    
+
+    # Single query with conditional counts instead of one COUNT per role
+    stats = User.objects.aggregate(
+        total=Count('id'),
+        superadmins=Count('id', filter=Q(role='superadmin')),
+        regular_users=Count('id', filter=Q(role='user')),
+    )
+
     context = {
         'users': users,
-        'total_users': users.count(),
-        'superadmins': users.filter(role='superadmin').count(),
+        'total_users': stats['total'],
+        'superadmins': stats['superadmins'],
         'agents': Agent.objects.filter(is_active=True).count(),
-        'regular_users': users.filter(role='user').count(),
+        'regular_users': stats['regular_users'],
     }
     return render(request, 'user_management/system_users_list.html', context)
 
@@ -444,27 +486,10 @@ def user_profile_view(request, user_id):
 @login_required
 def permissions_list_view(request):
     """List all available permissions"""
-    permissions = Permission.objects.all().order_by('key')
-    
-    # Group by category
-    permission_groups = {}
-    for perm in permissions:
-        if 'user' in perm.key:
-            category = 'Users'
-        elif 'organisation' in perm.key:
-            category = 'Organisations'
-        elif 'report' in perm.key or 'analytics' in perm.key:
-            category = 'Reports'
-        elif 'call' in perm.key or 'campaign' in perm.key:
-            category = 'Calls'
-        elif 'contact' in perm.key:
-            category = 'Contacts'
-        else:
-            category = 'System'
-        
-        if category not in permission_groups:
-            permission_groups[category] = []
-        permission_groups[category].append(perm)
+    permissions = Permission.objects.all().order_by('category', 'key')
+    
+    # Group by stored category (rows arrive sorted, so one pass suffices)
+    permission_groups = group_permissions_by_category(permissions)
     
     context = {
         'permission_groups': permission_groups,
@@ -3,21 +3,31 @@
 from .permissions import (
     check_user_permission,
     get_user_accessible_organisations,
+    get_user_manageable_organisations,
+    with_active_agent,
     can_user_access_organisation,
     get_user_permissions_for_organisation,
     can_user_manage_organisation,
     get_organisation_agent,
     is_user_agent_of_organisation,
     get_permission_summary,
+    get_cached_permission_summary,
+    invalidate_permission_summaries,
+    invalidate_permission_summary,
 )
 
 __all__ = [
     'check_user_permission',
     'get_user_accessible_organisations',
+    'get_user_manageable_organisations',
+    'with_active_agent',
     'can_user_access_organisation',
     'get_user_permissions_for_organisation',
     'can_user_manage_organisation',
     'get_organisation_agent',
     'is_user_agent_of_organisation',
     'get_permission_summary',
+    'get_cached_permission_summary',
+    'invalidate_permission_summaries',
+    'invalidate_permission_summary',
 ]
@@ -5,10 +5,21 @@ This module provides helper functions for checking user permissions and
 determining which organizations a user can access based on their role.
 """
 
-from django.db.models import QuerySet
+import time
+
+from django.core.cache import cache
+from django.db.models import Prefetch, QuerySet
 from typing import Optional
 
 
+# Permission summaries are cached per user under a shared version that
+# permission-related writes bump; a User save drops only that user's entry
+# (see signals.py)
+PERMISSION_SUMMARY_CACHE_TTL = 60
+PERMISSION_SUMMARY_VERSION_KEY = 'accounts:permsummary:version'
+PERMISSION_SUMMARY_KEY = 'accounts:permsummary:{user_pk}:{version}'
+
+
 def check_user_permission(user, permission_key: str, organisation=None) -> bool:
     """
     Check if user has permission, considering organizational context.
@@ -88,6 +99,63 @@ def get_user_accessible_organisations(user) -> QuerySet:
     ).distinct()
 
 
+def get_user_manageable_organisations(user) -> QuerySet:
+    """
+    Get all organisations a user can manage/administer.
+    
+    Mirrors ``can_user_manage_organisation`` as a queryset so a lookup and
+    the management check can run as a single query.
+    
+    Args:
+        user: User instance
+    
+    Returns:
+        QuerySet: Organisation queryset the user may manage
+    
+    Example:
+        >>> org = get_user_manageable_organisations(user).get(pk=org_id)
+    """
+    from callfairy.apps.accounts.models import Organisation
+    
+    # SuperAdmin can manage all organisations
+    if user.is_superadmin:
+        return Organisation.objects.all()
+    
+    # Agent can manage only their managed organisation
+    managed_org = user.get_managed_organisation()
+    if managed_org:
+        return Organisation.objects.filter(id=managed_org.id)
+    
+    return Organisation.objects.none()
+
+
+def with_active_agent(queryset) -> QuerySet:
+    """
+    Prefetch each organisation's active agent (with its user) onto ``active_agents``.
+    
+    ``OrganisationSerializer`` reads this attribute instead of querying the
+    agent table once per organisation.
+    
+    Args:
+        queryset: Organisation queryset
+    
+    Returns:
+        QuerySet: The same queryset with the agent prefetch applied
+    
+    Example:
+        >>> orgs = with_active_agent(get_user_accessible_organisations(user))
+    """
+    from callfairy.apps.accounts.models import Agent
+    
+    return queryset.prefetch_related(
+        Prefetch(
+            'agents',
+            queryset=Agent.objects.filter(is_active=True).select_related('user'),
+            to_attr='active_agents',
+        )
+    )
+
+
 def can_user_access_organisation(user, organisation) -> bool:
     """
     Check if a user can access a specific organisation.
@@ -248,3 +316,51 @@ def get_permission_summary(user) -> dict:
             get_user_accessible_organisations(user).values('id', 'name')
         ),
     }
+
+
+def get_cached_permission_summary(user) -> dict:
+    """
+    Get the permission summary for a user, cached for a short TTL.
+    
+    Entries are keyed by user and the current summary version, so
+    invalidate_permission_summaries() retires every cached summary at once
+    and invalidate_permission_summary() drops a single user's.
+    
+    Args:
+        user: User instance
+    
+    Returns:
+        dict: Same structure as get_permission_summary()
+    
+    Example:
+        >>> summary = get_cached_permission_summary(request.user)
+    """
+    version = cache.get_or_set(PERMISSION_SUMMARY_VERSION_KEY, time.time_ns, None)
+    return cache.get_or_set(
+        PERMISSION_SUMMARY_KEY.format(user_pk=user.pk, version=version),
+        lambda: get_permission_summary(user),
+        PERMISSION_SUMMARY_CACHE_TTL,
+    )
+
+
+def invalidate_permission_summaries() -> None:
+    """
+    Retire all cached permission summaries.
+    
+    Call after writes that bypass model signals (bulk_create, queryset update).
+    """
+    cache.set(PERMISSION_SUMMARY_VERSION_KEY, time.time_ns(), None)
+
+
+def invalidate_permission_summary(user_pk) -> None:
+    """
+    Drop one user's cached permission summary.
+    
+    Use for changes to a single user; other users' summaries stay cached.
+    
+    Args:
+        user_pk: Primary key of the user
+    """
+    version = cache.get(PERMISSION_SUMMARY_VERSION_KEY)
+    if version is not None:
+        cache.delete(PERMISSION_SUMMARY_KEY.format(user_pk=user_pk, version=version))
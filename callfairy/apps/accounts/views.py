@@ -1,16 +1,20 @@
+import logging
+import re
+
 from rest_framework import generics, permissions, status
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from django_otp.plugins.otp_totp.models import TOTPDevice
 
 from .models import (
     AllowedEmailDomain, 
-    GoogleSignInAudit,
     Organisation,
     Agent,
     Permission,
@@ -33,6 +37,7 @@ from .serializers import (
     GrantAgentPermissionSerializer,
     PermissionSerializer,
 )
+from .tasks import record_google_signin_audit
 from .permissions import (
     IsSuperAdmin,
     CanAccessOrganisation,
@@ -40,10 +45,34 @@ from .permissions import (
 )
 from .utils import (
     get_user_accessible_organisations,
-    get_permission_summary,
+    get_cached_permission_summary,
+    get_user_manageable_organisations,
+    with_active_agent,
 )
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+# TOTP devices issue 6-digit codes by default (8 when configured)
+TOTP_CODE_RE = re.compile(r'\d{6,8}')
+
+
+def serializable_agents():
+    """
+    Agent queryset with every relation AgentSerializer walks joined or prefetched.
+    """
+    return Agent.objects.select_related('user', 'organisation', 'assigned_by').prefetch_related(
+        Prefetch(
+            'permissions',
+            queryset=AgentPermissions.objects.select_related('permission'),
+            to_attr='permission_grants',
+        ),
+        Prefetch(
+            'organisation__agents',
+            queryset=Agent.objects.filter(is_active=True).select_related('user'),
+            to_attr='active_agents',
+        ),
+    )
 
 
 class RegisterView(generics.CreateAPIView):
@@ -54,11 +83,11 @@ class RegisterView(generics.CreateAPIView):
         response = super().create(request, *args, **kwargs)
         # Optionally include email verification token in DEBUG for convenience/tests
         token = self.get_serializer_context().get('email_verification_token')
-        data = response.data if isinstance(response.data, dict) else {}
-        data.update({"detail": "Registration successful. Please verify your email to activate your account."})
-        if settings.DEBUG and token:
-            data["email_verification_token"] = token
-        return Response(data, status=status.HTTP_201_CREATED)
+        if isinstance(response.data, dict):
+            response.data["detail"] = "Registration successful. Please verify your email to activate your account."
+            if settings.DEBUG and token:
+                response.data["email_verification_token"] = token
+        return response
 
 
 class LoginView(TokenObtainPairView):
@@ -111,9 +140,8 @@ class TOTPEnableView(APIView):
         if not created and device.confirmed:
             return Response({"detail": "2FA already enabled."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Ensure device is unconfirmed for verification step
-        device.confirmed = False
-        device.save(update_fields=["confirmed"])
+        # Past this point the device is unconfirmed (new, or reused before
+        # verification), so no extra write is needed for the verification step
 
         provisioning_uri = getattr(device, "config_url", None)
         data = {"device_id": device.id}
@@ -126,9 +154,13 @@ class TOTPVerifyView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        code = str(request.data.get("code", "")).strip()
+        code = str(request.data.get("code", "")).strip().replace(" ", "")
         if not code:
             return Response({"code": ["This field is required."]}, status=status.HTTP_400_BAD_REQUEST)
+        # Malformed codes can never verify: reject them with the same response
+        # as a wrong code, before any device lookup or throttle bookkeeping
+        if not TOTP_CODE_RE.fullmatch(code):
+            return Response({"detail": "Invalid code."}, status=status.HTTP_400_BAD_REQUEST)
         try:
             device = TOTPDevice.objects.get(user=request.user, name="default")
         except TOTPDevice.DoesNotExist:
@@ -161,6 +193,19 @@ class GoogleLoginView(APIView):
             return xff.split(',')[0].strip()
         return request.META.get('REMOTE_ADDR')
 
+    def _audit(self, request, **fields):
+        """Record a sign-in attempt off the request path via Celery."""
+        fields.update(
+            ip=self._client_ip(request),
+            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        )
+        try:
+            record_google_signin_audit.delay(**fields)
+        except Exception as e:
+            # Broker unavailable: write synchronously rather than lose the audit row
+            logger.warning(f"Failed to queue Google sign-in audit, writing inline: {e}")
+            record_google_signin_audit(**fields)
+
     def post(self, request):
         serializer = GoogleLoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -171,17 +216,16 @@ class GoogleLoginView(APIView):
         domain = email.split('@')[-1].lower() if '@' in email else ''
 
         # Domain restriction: if any active domains exist, enforce membership
-        active_domains = list(AllowedEmailDomain.objects.filter(is_active=True).values_list('domain', flat=True))
-        if active_domains and domain not in [d.lower() for d in active_domains]:
-            GoogleSignInAudit.objects.create(
-                user=None,
+        active_domains = AllowedEmailDomain.get_active_domains()
+        if active_domains and domain not in active_domains:
+            self._audit(
+                request,
+                user_id=None,
                 email=email,
                 domain=domain,
                 provider_sub=sub,
                 success=False,
                 reason=f"domain_not_allowed: {domain}",
-                ip=self._client_ip(request),
-                user_agent=request.META.get('HTTP_USER_AGENT', ''),
             )
             return Response({"detail": "Email domain not allowed."}, status=status.HTTP_403_FORBIDDEN)
 
@@ -189,23 +233,29 @@ class GoogleLoginView(APIView):
             'name': name,
             'is_active': True,
         })
+        if created:
+            # A brand-new account cannot hold an agent assignment yet; prime
+            # the cache so UserSerializer below doesn't query for one
+            user._active_agent = None
         # Ensure the user is active (email is verified by Google)
         if not user.is_active:
             user.is_active = True
+            update_fields = ["is_active"]
             if name and not user.name:
                 user.name = name
-            user.save(update_fields=["is_active", "name"]) if name else user.save(update_fields=["is_active"])
+                update_fields.append("name")
+            # save() rather than update() so post_save refreshes permission summaries
+            user.save(update_fields=update_fields)
 
         # Audit success
-        GoogleSignInAudit.objects.create(
-            user=user,
+        self._audit(
+            request,
+            user_id=str(user.pk),
             email=email,
             domain=domain,
             provider_sub=sub,
             success=True,
             reason="",
-            ip=self._client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', ''),
         )
 
         refresh = RefreshToken.for_user(user)
@@ -264,7 +314,8 @@ class OrganisationListView(APIView):
     
     def get(self, request):
         """Get organisations accessible to current user."""
-        orgs = get_user_accessible_organisations(request.user)
+        # Evaluate once so the count below doesn't issue a second query
+        orgs = list(with_active_agent(get_user_accessible_organisations(request.user)))
         serializer = OrganisationSerializer(
             orgs, 
             many=True, 
@@ -272,7 +323,7 @@ class OrganisationListView(APIView):
         )
         return Response({
             'organisations': serializer.data,
-            'count': orgs.count(),
+            'count': len(orgs),
             'user_role': request.user.role,
         })
 
@@ -288,8 +339,13 @@ class OrganisationDetailView(APIView):
     
     def get(self, request, pk):
         """Get organisation details."""
-        org = get_object_or_404(Organisation, pk=pk)
-        self.check_object_permissions(request, org)
+        # Scope the lookup to accessible organisations instead of a separate
+        # object-permission query; inaccessible organisations return 404
+        if request.user.is_superadmin:
+            orgs = Organisation.objects.all()
+        else:
+            orgs = get_user_accessible_organisations(request.user)
+        org = get_object_or_404(with_active_agent(orgs), pk=pk)
         
         serializer = OrganisationSerializer(org, context={'request': request})
         return Response(serializer.data)
@@ -315,8 +371,10 @@ class OrganisationUpdateView(APIView):
     
     def _update(self, request, pk, partial=False):
         """Handle update logic."""
-        org = get_object_or_404(Organisation, pk=pk)
-        self.check_object_permissions(request, org)
+        # Lookup scoped to organisations the user may manage (404 otherwise)
+        org = get_object_or_404(
+            with_active_agent(get_user_manageable_organisations(request.user)), pk=pk
+        )
         
         serializer = OrganisationSerializer(
             org, 
@@ -361,7 +419,8 @@ class AssignAgentView(APIView):
             assigned_by=request.user
         )
         
-        # Return agent details
+        # Return agent details, re-fetched with the relations the serializer reads
+        agent = serializable_agents().get(pk=agent.pk)
         agent_serializer = AgentSerializer(agent, context={'request': request})
         return Response({
             'message': f'{user.name} assigned as agent for {org.name}',
@@ -380,21 +439,19 @@ class RevokeAgentView(APIView):
     
     def post(self, request, agent_id):
         """Revoke agent designation."""
-        agent = get_object_or_404(Agent, id=agent_id, is_active=True)
+        agent = get_object_or_404(
+            Agent.objects.select_related('user', 'organisation'), id=agent_id, is_active=True
+        )
         
         user_name = agent.user.name
         org_name = agent.organisation.name
         
-        # Revoke agent
-        Agent.revoke_agent(agent_id, revoked_by=request.user)
-        
-        # Refresh agent to get updated status
-        agent.refresh_from_db()
-        agent.user.refresh_from_db()
+        # Revoke agent; the returned instance carries the user's synced role
+        revoked_agent = Agent.revoke_agent(agent_id, revoked_by=request.user)
         
         return Response({
             'message': f'Agent {user_name} revoked from {org_name}',
-            'user_role': agent.user.role,  # Will be 'user' now
+            'user_role': revoked_agent.user.role,  # Will be 'user' now
         })
 
 
@@ -404,6 +461,7 @@ class AgentListView(APIView):
     Only SuperAdmins can list all agents.
     
     GET /api/agents/
+    GET /api/agents/?page=2  (paginated)
     """
     permission_classes = [IsSuperAdmin]
     
@@ -411,17 +469,25 @@ class AgentListView(APIView):
         """List all active agents."""
         active_only = request.query_params.get('active', 'true').lower() == 'true'
         
+        agents = serializable_agents()
         if active_only:
-            agents = Agent.objects.filter(is_active=True)
-        else:
-            agents = Agent.objects.all()
+            agents = agents.filter(is_active=True)
+        agents = agents.order_by('-assigned_at')
         
-        agents = agents.select_related('user', 'organisation', 'assigned_by').order_by('-assigned_at')
+        # Paginate on request so only one page of agents (and their prefetches) is loaded
+        if 'page' in request.query_params:
+            paginator = PageNumberPagination()
+            page = paginator.paginate_queryset(agents, request, view=self)
+            serializer = AgentSerializer(page, many=True, context={'request': request})
+            return paginator.get_paginated_response(serializer.data)
+        
+        # Evaluate once; len() reuses the rows instead of issuing a COUNT
+        agents = list(agents)
         
         serializer = AgentSerializer(agents, many=True, context={'request': request})
         return Response({
             'agents': serializer.data,
-            'count': agents.count(),
+            'count': len(agents),
         })
 
 
@@ -439,7 +505,9 @@ class GrantAgentPermissionView(APIView):
     
     def post(self, request, agent_id):
         """Grant permission to agent."""
-        agent = get_object_or_404(Agent, id=agent_id, is_active=True)
+        agent = get_object_or_404(
+            Agent.objects.select_related('user', 'organisation'), id=agent_id, is_active=True
+        )
         
         serializer = GrantAgentPermissionSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -474,10 +542,10 @@ class RevokeAgentPermissionView(APIView):
     
     def delete(self, request, agent_id, permission_key):
         """Revoke permission from agent."""
-        agent = get_object_or_404(Agent, id=agent_id, is_active=True)
+        agent = get_object_or_404(Agent.objects.select_related('user'), id=agent_id, is_active=True)
         
         try:
-            permission = Permission.objects.get(key=permission_key)
+            permission = Permission.get_by_key(permission_key)
         except Permission.DoesNotExist:
             return Response(
                 {'error': 'Permission not found'},
@@ -502,12 +570,12 @@ class PermissionListView(APIView):
     
     def get(self, request):
         """List all permissions."""
-        perms = Permission.objects.all().order_by('name')
+        perms = list(Permission.objects.all().order_by('name'))
         serializer = PermissionSerializer(perms, many=True)
         
         return Response({
             'permissions': serializer.data,
-            'count': perms.count(),
+            'count': len(perms),
         })
 
 
@@ -521,7 +589,7 @@ class MyPermissionsView(APIView):
     
     def get(self, request):
         """Get permission summary for current user."""
-        summary = get_permission_summary(request.user)
+        summary = get_cached_permission_summary(request.user)
         return Response(summary)
 
 
@@ -535,7 +603,7 @@ class MyOrganisationsView(APIView):
     
     def get(self, request):
         """Get organisations user can access."""
-        orgs = get_user_accessible_organisations(request.user)
+        orgs = list(with_active_agent(get_user_accessible_organisations(request.user)))
         serializer = OrganisationSerializer(orgs, many=True, context={'request': request})
         
         managed_org = None
@@ -550,7 +618,7 @@ class MyOrganisationsView(APIView):
         
         return Response({
             'organisations': serializer.data,
-            'count': orgs.count(),
+            'count': len(orgs),
             'is_agent': request.user.is_agent(),
             'managed_organisation': managed_org,
         })
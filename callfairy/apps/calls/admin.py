@@ -2,6 +2,7 @@
 Admin configuration for calls app.
 """
 from django.contrib import admin
+from django.forms.models import BaseInlineFormSet
 from .models import Contact, Call, BatchCall, CallLog, CSVUpload
 
 
@@ -10,6 +11,7 @@ class ContactAdmin(admin.ModelAdmin):
     """Admin for Contact model."""
     
     list_display = ['name', 'phone_number', 'email', 'user', 'created_at']
+    list_select_related = ['user']
     list_filter = ['created_at', 'user']
     search_fields = ['name', 'phone_number', 'email']
     readonly_fields = ['id', 'created_at', 'updated_at']
@@ -27,12 +29,33 @@ class ContactAdmin(admin.ModelAdmin):
     )
 
 
+CALL_LOG_INLINE_LIMIT = 50
+
+
+class RecentCallLogFormSet(BaseInlineFormSet):
+    """Inline formset limited to the most recent logs of a call."""
+    
+    def get_queryset(self):
+        # Slice after the parent filters by call; the sliced queryset is cached
+        # so the formset evaluates it once.
+        if not hasattr(self, '_recent_queryset'):
+            self._recent_queryset = super().get_queryset().order_by('-created_at')[:CALL_LOG_INLINE_LIMIT]
+        return self._recent_queryset
+
+
 class CallLogInline(admin.TabularInline):
-    """Inline admin for CallLog."""
+    """Inline admin for CallLog (latest entries only)."""
     model = CallLog
+    formset = RecentCallLogFormSet
     extra = 0
+    fields = ['event_type', 'message', 'data', 'created_at']
     readonly_fields = ['event_type', 'message', 'data', 'created_at']
     can_delete = False
+    show_change_link = False
+    
+    def has_add_permission(self, request, obj=None):
+        """Logs are written by the system, never through the admin."""
+        return False
 
 
 @admin.register(Call)
@@ -43,6 +66,7 @@ class CallAdmin(admin.ModelAdmin):
         'phone_number', 'status', 'user', 'batch', 
         'created_at', 'duration', 'bland_call_id'
     ]
+    list_select_related = ['user', 'batch']
     list_filter = ['status', 'created_at', 'user', 'model']
     search_fields = ['phone_number', 'bland_call_id', 'task']
     readonly_fields = [
@@ -81,6 +105,7 @@ class BatchCallAdmin(admin.ModelAdmin):
         'label', 'status', 'user', 'total_contacts', 
         'successful_calls', 'failed_calls', 'created_at'
     ]
+    list_select_related = ['user']
     list_filter = ['status', 'created_at', 'user', 'model']
     search_fields = ['label', 'bland_batch_id', 'base_prompt']
     readonly_fields = [
@@ -112,6 +137,7 @@ class CallLogAdmin(admin.ModelAdmin):
     """Admin for CallLog model."""
     
     list_display = ['call', 'event_type', 'message', 'created_at']
+    list_select_related = ['call']
     list_filter = ['event_type', 'created_at']
     search_fields = ['message', 'call__phone_number', 'call__bland_call_id']
     readonly_fields = ['id', 'call', 'event_type', 'message', 'data', 'created_at']
@@ -133,6 +159,7 @@ class CSVUploadAdmin(admin.ModelAdmin):
         'filename', 'user', 'status', 'total_rows',
         'successful_imports', 'failed_imports', 'created_at'
     ]
+    list_select_related = ['user']
     list_filter = ['status', 'created_at', 'user']
     search_fields = ['filename', 'user__email']
     readonly_fields = [
@@ -0,0 +1,175 @@
+"""
+CSV contact import for the calls app.
+
+Shared by CSVUploadViewSet (validation) and the process_csv_upload task (import).
+"""
+import csv
+import io
+import re
+
+from django.utils import timezone
+
+from .models import Contact
+
+
+# Flexible column name mappings
+COLUMN_MAPPINGS = {
+    'name': ['name', 'full_name', 'fullname', 'customer_name', 'contact_name',
+             'full name', 'customer name', 'contact name', 'client_name',
+             'client name', 'person', 'contact', 'first_name', 'firstname'],
+    'phone_number': ['phone_number', 'phone', 'phonenumber', 'mobile', 'cell',
+                    'phone number', 'mobile_number', 'mobile number', 'cell_number',
+                    'cell number', 'telephone', 'tel', 'contact_number', 'number',
+                    'phone_no', 'mobile_no'],
+    'email': ['email', 'email_address', 'email address', 'e-mail', 'e_mail',
+              'mail', 'contact_email', 'contact email'],
+    'tags': ['tags', 'tag', 'category', 'categories', 'label', 'labels', 'type'],
+}
+
+# "+" followed by a country code and up to 15 digits in total; shared with
+# the serializers' validate_e164
+E164_RE = re.compile(r'\+[1-9]\d{6,14}')
+
+
+def open_text(file):
+    """Wrap an uploaded or stored file for lazy UTF-8 decoding from the start."""
+    file.seek(0)
+    return io.TextIOWrapper(file, encoding='utf-8', newline='')
+
+
+# {variation: (field, rank)}; a lower rank is an earlier, preferred variation
+VARIATION_INDEX = {
+    variation: (field, rank)
+    for field, variations in COLUMN_MAPPINGS.items()
+    for rank, variation in enumerate(variations)
+}
+
+
+def map_headers(headers):
+    """
+    Map standard field names to the CSV column that holds them.
+    
+    Computed once per file so rows are read with direct key lookups.
+    
+    Args:
+        headers: Column names from the CSV header row
+    
+    Returns:
+        dict: {field: original_header} for each field found
+    """
+    mapped = {}
+    ranks = {}
+    for header in headers:
+        match = VARIATION_INDEX.get(header.lower().strip())
+        if match is None:
+            continue
+        field, rank = match
+        # Earliest variation in COLUMN_MAPPINGS wins, then the first such column
+        if field not in ranks or rank < ranks[field]:
+            ranks[field] = rank
+            mapped[field] = header
+    
+    return mapped
+
+
+def get_mapped_value(row, column):
+    """Get the stripped value of a mapped column, or '' if unmapped or empty."""
+    if column is None:
+        return ''
+    value = row.get(column)
+    return value.strip() if value else ''
+
+
+def import_csv_upload(csv_upload):
+    """Process uploaded CSV file and create contacts with flexible header mapping."""
+    # Kept as its own write so clients polling the upload see it in progress
+    csv_upload.status = 'processing'
+    csv_upload.save(update_fields=['status'])
+
+    errors = []
+    total_rows = 0
+    successful_imports = 0
+    failed_imports = 0
+
+    try:
+        # Stream the file; rows are parsed lazily and inserted in batches
+        csv_reader = csv.DictReader(open_text(csv_upload.file))
+
+        # Map headers
+        headers = csv_reader.fieldnames or []
+        mapped_headers = map_headers(headers)
+        name_col = mapped_headers.get('name')
+        phone_col = mapped_headers.get('phone_number')
+        email_col = mapped_headers.get('email')
+        tags_col = mapped_headers.get('tags')
+        mapped_keys = set(mapped_headers.values())
+
+        def parsed_contacts():
+            nonlocal total_rows, successful_imports, failed_imports
+
+            for row_num, row in enumerate(csv_reader, start=1):
+                total_rows += 1
+
+                # Extract data from CSV using flexible mapping
+                name = get_mapped_value(row, name_col)
+                phone_number = get_mapped_value(row, phone_col)
+
+                # Validate required fields and phone number format
+                if not name or not phone_number:
+                    error = "Name and phone_number are required"
+                elif not E164_RE.fullmatch(phone_number):
+                    error = "Phone number must be in E.164 format (e.g., +12223334444)"
+                else:
+                    error = None
+
+                if error:
+                    failed_imports += 1
+                    errors.append({
+                        'row': row_num,
+                        'error': error,
+                        'data': row
+                    })
+                    continue
+
+                email = get_mapped_value(row, email_col)
+                tags_str = get_mapped_value(row, tags_col)
+
+                # Extract metadata (any additional columns not mapped)
+                metadata = {
+                    key: value for key, value in row.items()
+                    if key not in mapped_keys and value
+                }
+
+                # Extract tags if present
+                tags = []
+                if tags_str:
+                    tags = [tag.strip() for tag in tags_str.split(',') if tag.strip()]
+
+                successful_imports += 1
+                yield {
+                    'name': name,
+                    'phone_number': phone_number,
+                    'email': email if email else None,
+                    'metadata': metadata,
+                    'tags': tags,
+                }
+
+        # Bulk insert contacts (COPY on PostgreSQL) as the rows are parsed
+        Contact.bulk_insert(csv_upload.user, parsed_contacts())
+
+        # Update CSV upload record
+        csv_upload.status = 'completed'
+        csv_upload.total_rows = total_rows
+        csv_upload.successful_imports = successful_imports
+        csv_upload.failed_imports = failed_imports
+        csv_upload.error_log = errors
+        csv_upload.processed_at = timezone.now()
+        csv_upload.save(update_fields=[
+            'status', 'total_rows', 'successful_imports', 'failed_imports',
+            'error_log', 'processed_at',
+        ])
+
+    except Exception as e:
+        csv_upload.status = 'failed'
+        csv_upload.error_log = [{'error': f'Failed to process CSV: {str(e)}'}]
+        csv_upload.save(update_fields=['status', 'error_log'])
@@ -1,19 +1,40 @@
 """
 Models for Bland AI call management.
 """
-from django.db import models
+from django.conf import settings
+from django.db import connection, models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+import csv
+import io
+import itertools
+import json
+import os
+import time
 import uuid
 
 User = get_user_model()
 
 
+def uuid7():
+    """
+    Time-ordered UUID (RFC 9562 version 7).
+    
+    The leading 48 bits are the Unix time in milliseconds, so rows keyed by
+    it are inserted at the right edge of the primary key index instead of
+    on random leaf pages.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), 'big')
+    value = value & ~(0xF << 76) | 0x7 << 76  # version 7
+    value = value & ~(0x3 << 62) | 0x2 << 62  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+
 class Contact(models.Model):
     """Model to store contacts for calls."""
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='contacts')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='contacts', db_index=False)
     
     # Contact Information
     name = models.CharField(max_length=255)
@@ -30,6 +51,7 @@ class Contact(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        # Foreign keys that lead a composite index below are created with db_index=False
         indexes = [
             models.Index(fields=['user', 'phone_number']),
             models.Index(fields=['user', 'created_at']),
@@ -37,6 +59,64 @@ class Contact(models.Model):
     
     def __str__(self):
         return f"{self.name} - {self.phone_number}"
+    
+    # Rows buffered per COPY statement in bulk_insert
+    COPY_FLUSH_ROWS = 10000
+    COPY_COLUMNS = ('id', 'user_id', 'name', 'phone_number', 'email', 'metadata', 'tags', 'created_at', 'updated_at')
+    
+    @classmethod
+    def bulk_insert(cls, user, rows):
+        """
+        Insert contacts for a user without building model instances.
+        
+        On PostgreSQL rows are streamed through COPY in blocks of
+        COPY_FLUSH_ROWS; other backends fall back to bulk_create.
+        
+        Args:
+            user: Owner of the contacts
+            rows: Iterable of dicts with name, phone_number and optional
+                email, metadata and tags
+        
+        Returns:
+            int: Number of contacts inserted
+        """
+        if connection.vendor != 'postgresql':
+            # Build and insert one batch at a time so memory stays bounded
+            batch_size = settings.CONTACT_BULK_BATCH_SIZE
+            rows = iter(rows)
+            inserted = 0
+            with transaction.atomic():
+                while batch := [cls(user=user, **row) for row in itertools.islice(rows, batch_size)]:
+                    cls.objects.bulk_create(batch)
+                    inserted += len(batch)
+            return inserted
+        
+        sql = f"COPY {cls._meta.db_table} ({', '.join(cls.COPY_COLUMNS)}) FROM STDIN WITH CSV"
+        now = timezone.now().isoformat()
+        inserted = 0
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        
+        with transaction.atomic(), connection.cursor() as cursor:
+            def flush():
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+                buffer.seek(0)
+                buffer.truncate()
+            
+            for row in rows:
+                # An unquoted empty field is NULL in COPY CSV, which is what a missing email should be
+                writer.writerow((
+                    uuid.uuid4(), user.pk, row['name'], row['phone_number'], row.get('email') or None,
+                    json.dumps(row.get('metadata') or {}), json.dumps(row.get('tags') or []), now, now,
+                ))
+                inserted += 1
+                if inserted % cls.COPY_FLUSH_ROWS == 0:
+                    flush()
+            if buffer.tell():
+                flush()
+        
+        return inserted
 
 
 class BatchCall(models.Model):
@@ -50,7 +130,7 @@ class BatchCall(models.Model):
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='batch_calls')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='batch_calls', db_index=False)
     
     # Batch Information
     label = models.CharField(max_length=255, help_text="Label for the batch")
@@ -88,6 +168,25 @@ class BatchCall(models.Model):
     
     def __str__(self):
         return f"{self.label} - {self.status}"
+    
+    def count_call_outcomes(self):
+        """
+        Count this batch's successful and failed calls in one query.
+        
+        Returns:
+            dict: {'successful': int, 'failed': int}
+        """
+        return self.calls.aggregate(
+            successful=models.Count('id', filter=models.Q(status='completed')),
+            failed=models.Count('id', filter=models.Q(status__in=FAILED_CALL_STATUSES)),
+        )
+
+
+# Call statuses that have not reached a final outcome yet
+ACTIVE_CALL_STATUSES = ['queued', 'initiated', 'ringing', 'in_progress']
+
+# Final call statuses counted as failures for a batch
+FAILED_CALL_STATUSES = ['failed', 'no_answer', 'busy']
 
 
 class Call(models.Model):
@@ -105,13 +204,17 @@ class Call(models.Model):
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='calls')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='calls', db_index=False)
     contact = models.ForeignKey(Contact, on_delete=models.SET_NULL, null=True, blank=True, related_name='calls')
-    batch = models.ForeignKey(BatchCall, on_delete=models.SET_NULL, null=True, blank=True, related_name='calls')
+    batch = models.ForeignKey(BatchCall, on_delete=models.SET_NULL, null=True, blank=True, related_name='calls', db_index=False)
     
     # Call Information
     phone_number = models.CharField(max_length=20)
-    task = models.TextField(help_text="Instructions for the AI agent")
+    task = models.TextField(
+        blank=True,
+        null=True,
+        help_text="Instructions for the AI agent; empty on batch calls that use the batch's base_prompt"
+    )
     
     # Bland AI Configuration
     voice = models.CharField(max_length=50, blank=True, null=True)
@@ -147,21 +250,42 @@ class Call(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['user', 'status']),
+            # Leading columns still serve the plain (user, status) / (batch, status) filters
+            models.Index(fields=['user', 'status', '-created_at']),
             models.Index(fields=['user', 'created_at']),
             models.Index(fields=['bland_call_id']),
-            models.Index(fields=['batch', 'status']),
+            models.Index(fields=['batch', 'status', 'created_at']),
+            # Batch call listings (API ?batch= filter, batch calls action, batch detail page)
+            models.Index(fields=['batch', 'created_at']),
+            # Only calls still in flight; stays small as finished calls pile up
+            models.Index(
+                fields=['status', 'created_at'],
+                name='call_active_idx',
+                condition=models.Q(status__in=ACTIVE_CALL_STATUSES),
+            ),
         ]
     
     def __str__(self):
         return f"Call to {self.phone_number} - {self.status}"
+    
+    @property
+    def effective_task(self):
+        """This call's own task, falling back to its batch's base_prompt."""
+        if self.task:
+            return self.task
+        if not self.batch_id:
+            return ''
+        # Querysets may annotate batch_prompt so the batch row is not loaded per call
+        if 'batch_prompt' in self.__dict__:
+            return self.batch_prompt
+        return self.batch.base_prompt
 
 
 class CallLog(models.Model):
     """Model to store detailed call logs and events."""
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    call = models.ForeignKey(Call, on_delete=models.CASCADE, related_name='logs')
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    call = models.ForeignKey(Call, on_delete=models.CASCADE, related_name='logs', db_index=False)
     
     # Log Information
     event_type = models.CharField(max_length=50, help_text="Type of event (e.g., status_change, webhook)")
@@ -192,7 +316,7 @@ class CSVUpload(models.Model):
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='csv_uploads')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='csv_uploads', db_index=False)
     
     # File Information
     file = models.FileField(upload_to='csv_uploads/%Y/%m/%d/')
@@ -1,10 +1,20 @@
 """
 Serializers for Bland AI call management.
 """
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
+from .csv_import import E164_RE
 from .models import Contact, Call, BatchCall, CallLog, CSVUpload
 
 
+def validate_e164(value):
+    """Raise ValidationError unless value is an E.164 phone number; return it unchanged."""
+    if not E164_RE.fullmatch(value):
+        raise serializers.ValidationError("Phone number must be in E.164 format (e.g., +12223334444)")
+    return value
+
+
 class ContactSerializer(serializers.ModelSerializer):
     """Serializer for Contact model."""
     
@@ -18,9 +28,7 @@ class ContactSerializer(serializers.ModelSerializer):
     
     def validate_phone_number(self, value):
         """Validate phone number format (E.164)."""
-        if not value.startswith('+'):
-            raise serializers.ValidationError("Phone number must be in E.164 format (e.g., +12223334444)")
-        return value
+        return validate_e164(value)
 
 
 class ContactBulkCreateSerializer(serializers.Serializer):
@@ -30,6 +38,13 @@ class ContactBulkCreateSerializer(serializers.Serializer):
         child=ContactSerializer(),
         min_length=1
     )
+    
+    def create(self, validated_data):
+        """Insert all contacts in batched INSERTs; expects save(user=...)."""
+        user = validated_data['user']
+        contacts = [Contact(user=user, **row) for row in validated_data['contacts']]
+        with transaction.atomic():
+            return Contact.objects.bulk_create(contacts, batch_size=settings.CONTACT_BULK_BATCH_SIZE)
 
 
 class CallLogSerializer(serializers.ModelSerializer):
@@ -42,10 +57,10 @@ class CallLogSerializer(serializers.ModelSerializer):
 
 
 class CallSerializer(serializers.ModelSerializer):
-    """Serializer for Call model."""
+    """Serializer for Call model (logs are paged separately via the logs action)."""
     
-    contact_name = serializers.CharField(source='contact.name', read_only=True)
-    logs = CallLogSerializer(many=True, read_only=True)
+    # Annotated onto the queryset (see serializable_calls in views)
+    contact_name = serializers.CharField(read_only=True)
     
     class Meta:
         model = Call
@@ -54,19 +69,52 @@ class CallSerializer(serializers.ModelSerializer):
             'max_duration', 'record', 'wait_for_greeting', 'status', 'bland_call_id',
             'duration', 'recording_url', 'transcript', 'analysis', 'metadata',
             'config', 'error_message', 'contact', 'contact_name', 'batch',
-            'created_at', 'updated_at', 'started_at', 'ended_at', 'logs'
+            'created_at', 'updated_at', 'started_at', 'ended_at'
         ]
         read_only_fields = [
             'id', 'status', 'bland_call_id', 'duration', 'recording_url',
             'transcript', 'analysis', 'error_message', 'created_at', 
-            'updated_at', 'started_at', 'ended_at', 'logs'
+            'updated_at', 'started_at', 'ended_at'
         ]
     
+    def to_representation(self, instance):
+        """Output the batch's base_prompt for batch calls without a task of their own."""
+        data = super().to_representation(instance)
+        data['task'] = instance.effective_task
+        return data
+    
+    def validate_task(self, value):
+        """Require a task outside a batch; store None instead of a copy of the batch's base_prompt."""
+        call = self.instance
+        if call is None or call.batch_id is None:
+            if not value:
+                raise serializers.ValidationError("A task is required for calls outside a batch.")
+            return value
+        
+        # GET returns the base_prompt as task, so a read-modify-write sends it back unchanged
+        if 'batch_prompt' in call.__dict__:
+            batch_prompt = call.batch_prompt
+        else:
+            batch_prompt = call.batch.base_prompt
+        if not value or value == batch_prompt:
+            return None
+        return value
+    
     def validate_phone_number(self, value):
         """Validate phone number format (E.164)."""
-        if not value.startswith('+'):
-            raise serializers.ValidationError("Phone number must be in E.164 format (e.g., +12223334444)")
-        return value
+        return validate_e164(value)
+
+
+class CallListSerializer(CallSerializer):
+    """Call serializer for list endpoints; leaves out transcript, analysis and config."""
+    
+    class Meta(CallSerializer.Meta):
+        fields = [
+            'id', 'phone_number', 'task', 'voice', 'model', 'first_sentence',
+            'max_duration', 'record', 'wait_for_greeting', 'status', 'bland_call_id',
+            'duration', 'recording_url', 'metadata', 'error_message', 'contact',
+            'contact_name', 'batch', 'created_at', 'updated_at', 'started_at', 'ended_at'
+        ]
 
 
 class CallCreateSerializer(serializers.ModelSerializer):
@@ -79,12 +127,12 @@ class CallCreateSerializer(serializers.ModelSerializer):
             'max_duration', 'record', 'wait_for_greeting', 'contact',
             'metadata', 'config'
         ]
+        # Only batch calls may leave task empty (they inherit the batch's base_prompt)
+        extra_kwargs = {'task': {'required': True, 'allow_null': False, 'allow_blank': False}}
     
     def validate_phone_number(self, value):
         """Validate phone number format (E.164)."""
-        if not value.startswith('+'):
-            raise serializers.ValidationError("Phone number must be in E.164 format (e.g., +12223334444)")
-        return value
+        return validate_e164(value)
 
 
 class BatchCallSerializer(serializers.ModelSerializer):
@@ -109,6 +157,12 @@ class BatchCallSerializer(serializers.ModelSerializer):
         ]
 
 
+class BatchCallListSerializer(BatchCallSerializer):
+    """Batch serializer for list endpoints; nests calls without transcript, analysis and config."""
+    
+    calls = CallListSerializer(many=True, read_only=True)
+
+
 class BatchCallCreateSerializer(serializers.Serializer):
     """Serializer for creating a batch call campaign."""
     
@@ -131,13 +185,12 @@ class BatchCallCreateSerializer(serializers.Serializer):
     def validate_contact_ids(self, value):
         """Validate that all contact IDs exist and belong to the user."""
         user = self.context['request'].user
-        existing_ids = Contact.objects.filter(
-            id__in=value,
-            user=user
-        ).values_list('id', flat=True)
+        value = list(dict.fromkeys(value))
+        contacts = Contact.objects.filter(id__in=value, user=user)
         
-        if len(existing_ids) != len(value):
-            missing = set(value) - set(existing_ids)
+        # COUNT on the happy path; only fetch the ids to report what is missing
+        if contacts.count() != len(value):
+            missing = set(value) - set(contacts.values_list('id', flat=True))
             raise serializers.ValidationError(
                 f"Invalid or unauthorized contact IDs: {missing}"
             )
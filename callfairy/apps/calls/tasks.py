@@ -3,8 +3,9 @@ Celery tasks for Bland AI call processing.
 """
 import sys
 import os
-import time
-from celery import shared_task
+from datetime import timedelta
+from celery import chord, shared_task
+from django.core.cache import cache
 from django.utils import timezone
 from django.conf import settings
 import logging
@@ -13,10 +14,28 @@ import logging
 sys.path.insert(0, os.path.join(settings.BASE_DIR.parent))
 from utils import BlandClient, BlandApiError
 
-from .models import Call, BatchCall, Contact, CallLog
+from .csv_import import import_csv_upload
+from .models import ACTIVE_CALL_STATUSES, Call, BatchCall, Contact, CallLog, CSVUpload
 
 logger = logging.getLogger(__name__)
 
+# One BlandClient per worker process, created lazily after the fork so its
+# requests.Session (and pooled HTTPS connections) is reused across tasks
+_client = None
+
+
+def get_bland_client():
+    """
+    Return this worker process's shared BlandClient, creating it on first use.
+    
+    Returns:
+        BlandClient: Client whose HTTP session is reused across tasks
+    """
+    global _client
+    if _client is None:
+        _client = BlandClient()
+    return _client
+
 
 @shared_task(bind=True, max_retries=3)
 def process_single_call(self, call_id):
@@ -26,26 +45,29 @@ def process_single_call(self, call_id):
     Args:
         call_id: UUID of the Call instance
     """
+    # Log rows are written together with the outcome in one bulk INSERT
+    pending_logs = []
+    
     try:
         call = Call.objects.get(id=call_id)
         call.status = 'initiated'
         call.started_at = timezone.now()
-        call.save()
+        call.save(update_fields=['status', 'started_at', 'updated_at'])
         
         # Create log entry
-        CallLog.objects.create(
+        pending_logs.append(CallLog(
             call=call,
             event_type='task_started',
             message='Celery task started processing call'
-        )
+        ))
         
         # Initialize Bland AI client
-        client = BlandClient()
+        client = get_bland_client()
         
         # Prepare call parameters
         call_params = {
             'phone_number': call.phone_number,
-            'task': call.task,
+            'task': call.effective_task,
             'record': call.record,
         }
         
@@ -72,15 +94,16 @@ def process_single_call(self, call_id):
         # Update call with Bland AI response
         call.bland_call_id = response.get('call_id')
         call.status = 'in_progress'
-        call.save()
+        call.save(update_fields=['status', 'bland_call_id', 'updated_at'])
         
         # Log success
-        CallLog.objects.create(
+        pending_logs.append(CallLog(
             call=call,
             event_type='call_initiated',
             message='Call successfully initiated with Bland AI',
             data=response
-        )
+        ))
+        CallLog.objects.bulk_create(pending_logs)
         
         logger.info(f"Call initiated successfully: {call.bland_call_id}")
         return {
@@ -97,14 +120,15 @@ def process_single_call(self, call_id):
         logger.error(f"Bland AI API error: {e}")
         call.status = 'failed'
         call.error_message = str(e)
-        call.save()
+        call.save(update_fields=['status', 'error_message', 'updated_at'])
         
-        CallLog.objects.create(
+        pending_logs.append(CallLog(
             call=call,
             event_type='call_failed',
             message=f'Bland AI API error: {str(e)}',
             data={'status_code': e.status_code, 'response': e.response}
-        )
+        ))
+        CallLog.objects.bulk_create(pending_logs)
         
         # Retry the task if retries are available
         raise self.retry(exc=e, countdown=60)
@@ -113,13 +137,14 @@ def process_single_call(self, call_id):
         logger.error(f"Unexpected error processing call: {e}")
         call.status = 'failed'
         call.error_message = str(e)
-        call.save()
+        call.save(update_fields=['status', 'error_message', 'updated_at'])
         
-        CallLog.objects.create(
+        pending_logs.append(CallLog(
             call=call,
             event_type='call_failed',
             message=f'Unexpected error: {str(e)}'
-        )
+        ))
+        CallLog.objects.bulk_create(pending_logs)
         
         return {'status': 'error', 'message': str(e)}
 
@@ -127,7 +152,10 @@ def process_single_call(self, call_id):
 @shared_task(bind=True, max_retries=3)
 def process_batch_call(self, batch_id):
     """
-    Process a batch of calls using Bland AI - makes individual calls sequentially.
+    Fan a batch out into one submit_batch_call task per queued call.
+    
+    The submit tasks are enqueued at once and paced by their rate_limit;
+    finalize_batch runs once all of them finish.
     
     Args:
         batch_id: UUID of the BatchCall instance
@@ -136,162 +164,42 @@ def process_batch_call(self, batch_id):
         batch = BatchCall.objects.get(id=batch_id)
         batch.status = 'processing'
         batch.started_at = timezone.now()
-        batch.save()
+        batch.save(update_fields=['status', 'started_at', 'updated_at'])
         
         logger.info(f"Processing batch: {batch.label}")
         
         # Get all calls for this batch
-        calls = Call.objects.filter(batch=batch, status='queued').order_by('created_at')
+        call_ids = list(
+            Call.objects.filter(batch=batch, status='queued')
+            .order_by('created_at')
+            .values_list('id', flat=True)
+        )
         
-        if not calls.exists():
+        if not call_ids:
             logger.warning(f"No queued calls found for batch {batch_id}")
             batch.status = 'completed'
             batch.completed_at = timezone.now()
-            batch.save()
+            batch.save(update_fields=['status', 'completed_at', 'updated_at'])
             return {'status': 'warning', 'message': 'No calls to process'}
         
-        # Initialize Bland AI client
-        client = BlandClient()
-        
-        total_calls = calls.count()
+        total_calls = len(call_ids)
         batch.total_contacts = total_calls
-        batch.save()
-        
-        successful_calls = 0
-        failed_calls = 0
-        
-        # Process each call sequentially
-        logger.info(f"Processing {total_calls} calls sequentially")
-        
-        for call in calls:
-            try:
-                logger.info(f"Processing call {call.id} to {call.phone_number}")
-                
-                # Update call status
-                call.status = 'initiated'
-                call.started_at = timezone.now()
-                call.save()
-                
-                # Prepare call parameters
-                call_params = {
-                    'phone_number': call.phone_number,
-                    'task': call.task,
-                    'record': call.record if call.record is not None else batch.record,
-                }
-                
-                # Add optional parameters
-                if call.voice or batch.voice:
-                    call_params['voice'] = call.voice or batch.voice
-                if call.model or batch.model:
-                    call_params['model'] = call.model or batch.model
-                if call.max_duration or batch.max_duration:
-                    call_params['max_duration'] = call.max_duration or batch.max_duration
-                if call.wait_for_greeting is not None:
-                    call_params['wait_for_greeting'] = call.wait_for_greeting
-                elif batch.wait_for_greeting is not None:
-                    call_params['wait_for_greeting'] = batch.wait_for_greeting
-                
-                # Send the call
-                response = client.send_call(**call_params)
-                
-                # Update call with Bland AI response
-                call.bland_call_id = response.get('call_id')
-                call.status = 'in_progress'
-                call.save()
-                
-                successful_calls += 1
-                logger.info(f"Call {call.id} initiated successfully: {call.bland_call_id}")
-                
-                # Create log entry
-                CallLog.objects.create(
-                    call=call,
-                    event_type='call_initiated',
-                    message=f'Batch call initiated with Bland AI',
-                    data=response
-                )
-                
-                # Add delay between calls to avoid rate limits
-                # Wait 3 seconds before next call (adjust if needed)
-                if successful_calls < total_calls:  # Don't wait after last call
-                    logger.info("Waiting 70 seconds before next call to avoid rate limits...")
-                    time.sleep(70)
-                
-            except BlandApiError as e:
-                logger.error(f"Bland API error for call {call.id}: {e}")
-                
-                # If rate limit error, wait and retry once
-                if e.status_code == 429:
-                    logger.warning(f"Rate limit hit for call {call.id}. Waiting 10 seconds and retrying...")
-                    time.sleep(10)
-                    
-                    try:
-                        # Retry the call
-                        response = client.send_call(**call_params)
-                        call.bland_call_id = response.get('call_id')
-                        call.status = 'in_progress'
-                        call.save()
-                        successful_calls += 1
-                        logger.info(f"Call {call.id} retry successful: {call.bland_call_id}")
-                        
-                        CallLog.objects.create(
-                            call=call,
-                            event_type='call_initiated',
-                            message=f'Batch call initiated after rate limit retry',
-                            data=response
-                        )
-                        continue  # Skip to next call
-                        
-                    except Exception as retry_error:
-                        logger.error(f"Retry also failed for call {call.id}: {retry_error}")
-                
-                # Mark call as failed
-                call.status = 'failed'
-                call.error_message = str(e)
-                call.save()
-                failed_calls += 1
-                
-                CallLog.objects.create(
-                    call=call,
-                    event_type='call_failed',
-                    message=f'Bland AI API error: {str(e)}',
-                    data={'status_code': e.status_code, 'response': e.response}
-                )
-                
-            except Exception as e:
-                logger.error(f"Unexpected error for call {call.id}: {e}")
-                call.status = 'failed'
-                call.error_message = str(e)
-                call.save()
-                failed_calls += 1
-                
-                CallLog.objects.create(
-                    call=call,
-                    event_type='call_failed',
-                    message=f'Unexpected error: {str(e)}'
-                )
-        
-        # Update batch status
-        batch.successful_calls = successful_calls
-        batch.failed_calls = failed_calls
-        batch.status = 'completed'
-        batch.completed_at = timezone.now()
-        batch.save()
-        
-        logger.info(f"Batch {batch.label} completed: {successful_calls} successful, {failed_calls} failed")
-        
-        # Schedule status updates for all in-progress calls after 1 minute
-        in_progress_calls = Call.objects.filter(batch=batch, status='in_progress')
-        for call in in_progress_calls:
-            if call.bland_call_id:
-                update_call_status.apply_async(args=[str(call.id)], countdown=60)
-                logger.info(f"Scheduled status update for call {call.id} in 60 seconds")
+        batch.save(update_fields=['total_contacts', 'updated_at'])
+        
+        logger.info(f"Dispatching {total_calls} calls at {BATCH_CALL_RATE_LIMIT}")
+        
+        # No per-call countdowns: long ETAs sit in worker memory (and outlive the
+        # Redis visibility timeout). The submit tasks wait in the broker on the
+        # bland_batch queue (CELERY_TASK_ROUTES) and its single-process worker's
+        # rate limit paces them, so other queues are never held up
+        chord(
+            submit_batch_call.s(str(call_id)) for call_id in call_ids
+        )(finalize_batch.s(str(batch.id)))
         
         return {
-            'status': 'success',
+            'status': 'dispatched',
             'batch_id': str(batch.id),
             'total_calls': total_calls,
-            'successful': successful_calls,
-            'failed': failed_calls
         }
         
     except BatchCall.DoesNotExist:
@@ -303,11 +211,170 @@ def process_batch_call(self, batch_id):
         if 'batch' in locals():
             batch.status = 'failed'
             batch.completed_at = timezone.now()
-            batch.save()
+            batch.save(update_fields=['status', 'completed_at', 'updated_at'])
         
         return {'status': 'error', 'message': str(e)}
 
 
+# Bland AI allows roughly one call per BLAND_BATCH_CALL_INTERVAL seconds.
+# Celery enforces rate limits per worker instance, so the task is routed to the
+# bland_batch queue, which exactly one single-process worker consumes.
+BATCH_CALL_RATE_LIMIT = f'{3600 // settings.BLAND_BATCH_CALL_INTERVAL}/h'
+
+
+@shared_task(bind=True, max_retries=1, rate_limit=BATCH_CALL_RATE_LIMIT)
+def submit_batch_call(self, call_id):
+    """
+    Submit one call of a batch to Bland AI.
+    
+    Never raises, so a single failure cannot break the finalize_batch chord;
+    a 429 response is retried once after 10 seconds.
+    
+    Args:
+        call_id: UUID of the Call instance
+    
+    Returns:
+        dict: 'status' is 'success' or 'failed'
+    """
+    try:
+        call = Call.objects.select_related('batch').get(id=call_id)
+    except Call.DoesNotExist:
+        logger.error(f"Call {call_id} not found")
+        return {'status': 'failed', 'call_id': call_id}
+    
+    batch = call.batch
+    
+    try:
+        logger.info(f"Processing call {call.id} to {call.phone_number}")
+        
+        # Written together with the outcome below: one UPDATE per call
+        call.started_at = timezone.now()
+        
+        # Prepare call parameters
+        call_params = {
+            'phone_number': call.phone_number,
+            'task': call.effective_task,
+            'record': call.record if call.record is not None else batch.record,
+        }
+        
+        # Add optional parameters
+        if call.voice or batch.voice:
+            call_params['voice'] = call.voice or batch.voice
+        if call.model or batch.model:
+            call_params['model'] = call.model or batch.model
+        if call.max_duration or batch.max_duration:
+            call_params['max_duration'] = call.max_duration or batch.max_duration
+        if call.wait_for_greeting is not None:
+            call_params['wait_for_greeting'] = call.wait_for_greeting
+        elif batch.wait_for_greeting is not None:
+            call_params['wait_for_greeting'] = batch.wait_for_greeting
+        
+        # Send the call
+        response = get_bland_client().send_call(**call_params)
+        
+        # Update call with Bland AI response
+        call.bland_call_id = response.get('call_id')
+        call.status = 'in_progress'
+        call.save(update_fields=['status', 'started_at', 'bland_call_id', 'updated_at'])
+        
+        logger.info(f"Call {call.id} initiated successfully: {call.bland_call_id}")
+        
+        CallLog.objects.create(
+            call=call,
+            event_type='call_initiated',
+            message='Batch call initiated after rate limit retry' if self.request.retries else 'Batch call initiated with Bland AI',
+            data=response
+        )
+        
+        return {'status': 'success', 'call_id': call_id}
+        
+    except BlandApiError as e:
+        logger.error(f"Bland API error for call {call.id}: {e}")
+        
+        # If rate limit error, wait and retry once
+        if e.status_code == 429 and self.request.retries < self.max_retries:
+            logger.warning(f"Rate limit hit for call {call.id}. Retrying in 10 seconds...")
+            raise self.retry(exc=e, countdown=10)
+        
+        # Mark call as failed
+        call.status = 'failed'
+        call.error_message = str(e)
+        call.save(update_fields=['status', 'started_at', 'error_message', 'updated_at'])
+        
+        CallLog.objects.create(
+            call=call,
+            event_type='call_failed',
+            message=f'Bland AI API error: {str(e)}',
+            data={'status_code': e.status_code, 'response': e.response}
+        )
+        return {'status': 'failed', 'call_id': call_id}
+        
+    except Exception as e:
+        logger.error(f"Unexpected error for call {call.id}: {e}")
+        call.status = 'failed'
+        call.error_message = str(e)
+        call.save(update_fields=['status', 'started_at', 'error_message', 'updated_at'])
+        
+        CallLog.objects.create(
+            call=call,
+            event_type='call_failed',
+            message=f'Unexpected error: {str(e)}'
+        )
+        return {'status': 'failed', 'call_id': call_id}
+
+
+@shared_task
+def finalize_batch(results, batch_id):
+    """
+    Chord callback: record batch totals.
+    
+    Args:
+        results: Return values of the batch's submit_batch_call tasks
+        batch_id: UUID of the BatchCall instance
+    """
+    try:
+        batch = BatchCall.objects.get(id=batch_id)
+    except BatchCall.DoesNotExist:
+        logger.error(f"Batch {batch_id} not found")
+        return {'status': 'error', 'message': 'Batch not found'}
+    
+    successful_calls = sum(1 for result in results if result.get('status') == 'success')
+    failed_calls = len(results) - successful_calls
+    
+    # Update batch status
+    batch.successful_calls = successful_calls
+    batch.failed_calls = failed_calls
+    batch.status = 'completed'
+    batch.completed_at = timezone.now()
+    batch.save(update_fields=['successful_calls', 'failed_calls', 'status', 'completed_at', 'updated_at'])
+    
+    logger.info(f"Batch {batch.label} completed: {successful_calls} successful, {failed_calls} failed")
+    
+    return {
+        'status': 'success',
+        'batch_id': str(batch.id),
+        'total_calls': len(results),
+        'successful': successful_calls,
+        'failed': failed_calls
+    }
+
+
+# Bland AI call statuses mapped to Call.status values
+BLAND_STATUS_MAPPING = {
+    'completed': 'completed',
+    'failed': 'failed',
+    'no-answer': 'no_answer',
+    'busy': 'busy',
+    'in-progress': 'in_progress',
+}
+
+# Held in the shared (Redis) cache while a call has a status refresh queued or
+# running, so a slow refresh is not queued again on the next poll by any
+# worker process; expires on its own if the task is lost
+POLL_LOCK_KEY = 'calls:poll:{}'
+POLL_LOCK_TIMEOUT = settings.BLAND_STATUS_POLL_INTERVAL * 5
+
+
 @shared_task
 def update_call_status(call_id):
     """
@@ -317,46 +384,47 @@ def update_call_status(call_id):
         call_id: UUID of the Call instance
     """
     try:
-        call = Call.objects.get(id=call_id)
+        # Only the columns read here; everything written is listed in update_fields
+        call = Call.objects.only(
+            'id', 'bland_call_id', 'status', 'ended_at',
+            'duration', 'recording_url', 'transcript', 'analysis'
+        ).get(id=call_id)
         
         if not call.bland_call_id:
             logger.warning(f"Call {call_id} has no Bland AI call ID")
             return {'status': 'error', 'message': 'No Bland AI call ID'}
         
         # Initialize Bland AI client
-        client = BlandClient()
+        client = get_bland_client()
         
         # Get call details from Bland AI
         response = client.get_call(call.bland_call_id)
         
-        # Update call with response data
-        status_mapping = {
-            'completed': 'completed',
-            'failed': 'failed',
-            'no-answer': 'no_answer',
-            'busy': 'busy',
-            'in-progress': 'in_progress',
-        }
-        
+        # Collect only the fields whose values actually changed
+        update_fields = []
         bland_status = response.get('status', '').lower()
-        call.status = status_mapping.get(bland_status, call.status)
-        
-        # Update call data
-        if response.get('duration'):
-            call.duration = response.get('duration')
-        if response.get('recording_url'):
-            call.recording_url = response.get('recording_url')
-        if response.get('transcript'):
-            call.transcript = response.get('transcript')
-        if response.get('analysis'):
-            call.analysis = response.get('analysis')
+        new_status = BLAND_STATUS_MAPPING.get(bland_status, call.status)
+        if new_status != call.status:
+            call.status = new_status
+            update_fields.append('status')
+        
+        for field in ('duration', 'recording_url', 'transcript', 'analysis'):
+            value = response.get(field)
+            if value and value != getattr(call, field):
+                setattr(call, field, value)
+                update_fields.append(field)
         
         # Set ended_at if call is complete
         if call.status in ['completed', 'failed', 'no_answer', 'busy']:
             if not call.ended_at:
                 call.ended_at = timezone.now()
+                update_fields.append('ended_at')
+        
+        # Most polls of a running call see nothing new; skip the write and log
+        if not update_fields:
+            return {'status': 'success', 'call_status': call.status, 'changed': False}
         
-        call.save()
+        call.save(update_fields=update_fields + ['updated_at'])
         
         # Create log entry
         CallLog.objects.create(
@@ -367,7 +435,7 @@ def update_call_status(call_id):
         )
         
         logger.info(f"Call {call_id} status updated to {call.status}")
-        return {'status': 'success', 'call_status': call.status}
+        return {'status': 'success', 'call_status': call.status, 'changed': True}
         
     except Call.DoesNotExist:
         logger.error(f"Call {call_id} not found")
@@ -380,6 +448,49 @@ def update_call_status(call_id):
     except Exception as e:
         logger.error(f"Unexpected error updating call status: {e}")
         return {'status': 'error', 'message': str(e)}
+    
+    finally:
+        cache.delete(POLL_LOCK_KEY.format(call_id))
+
+
+@shared_task
+def poll_active_calls():
+    """
+    Periodic task: queue a status refresh for every call running on Bland AI.
+    
+    Scheduled every BLAND_STATUS_POLL_INTERVAL seconds by Celery Beat, so
+    calls keep being polled until they reach a final status instead of
+    getting a single delayed check each. Calls whose previous refresh is
+    still outstanding are skipped, and calls that have run past their
+    max_duration plus BLAND_STATUS_POLL_GRACE minutes are no longer polled.
+    """
+    now = timezone.now()
+    active_calls = (
+        Call.objects.filter(status__in=ACTIVE_CALL_STATUSES, bland_call_id__isnull=False)
+        .exclude(bland_call_id='')
+        .values_list('id', 'started_at', 'max_duration', 'batch__max_duration')
+    )
+    
+    queued = expired = 0
+    for call_id, started_at, max_duration, batch_max_duration in active_calls:
+        # Same fallback submit_batch_call uses, then Bland AI's own default
+        minutes = max_duration or batch_max_duration or settings.BLAND_DEFAULT_MAX_DURATION
+        cutoff = timedelta(minutes=minutes + settings.BLAND_STATUS_POLL_GRACE)
+        if started_at and now - started_at > cutoff:
+            expired += 1
+            continue
+        
+        if not cache.add(POLL_LOCK_KEY.format(call_id), True, POLL_LOCK_TIMEOUT):
+            continue
+        
+        update_call_status.delay(str(call_id))
+        queued += 1
+    
+    if queued:
+        logger.info(f"Queued status updates for {queued} active calls")
+    if expired:
+        logger.warning(f"Stopped polling {expired} calls past their max duration")
+    return {'status': 'success', 'queued': queued, 'expired': expired}
 
 
 @shared_task
@@ -398,15 +509,15 @@ def update_batch_status(batch_id):
             return {'status': 'error', 'message': 'No Bland AI batch ID'}
         
         # Initialize Bland AI client
-        client = BlandClient()
+        client = get_bland_client()
         
         # Get batch details from Bland AI
         response = client.get_batch(batch.bland_batch_id)
         
         # Update batch statistics
-        calls = batch.calls.all()
-        batch.successful_calls = calls.filter(status='completed').count()
-        batch.failed_calls = calls.filter(status__in=['failed', 'no_answer', 'busy']).count()
+        outcomes = batch.count_call_outcomes()
+        batch.successful_calls = outcomes['successful']
+        batch.failed_calls = outcomes['failed']
         
         # Check if batch is complete
         total_processed = batch.successful_calls + batch.failed_calls
@@ -414,7 +525,7 @@ def update_batch_status(batch_id):
             batch.status = 'completed'
             batch.completed_at = timezone.now()
         
-        batch.save()
+        batch.save(update_fields=['successful_calls', 'failed_calls', 'status', 'completed_at', 'updated_at'])
         
         logger.info(f"Batch {batch_id} status updated: {batch.successful_calls}/{batch.total_contacts} successful")
         return {
@@ -435,3 +546,29 @@ def update_batch_status(batch_id):
     except Exception as e:
         logger.error(f"Unexpected error updating batch status: {e}")
         return {'status': 'error', 'message': str(e)}
+
+
+@shared_task
+def process_csv_upload(csv_upload_id):
+    """
+    Import the contacts of an uploaded CSV file.
+    
+    Progress and results are recorded on the CSVUpload row.
+    
+    Args:
+        csv_upload_id: UUID of the CSVUpload instance
+    """
+    try:
+        csv_upload = CSVUpload.objects.select_related('user').get(id=csv_upload_id)
+    except CSVUpload.DoesNotExist:
+        logger.error(f"CSV upload {csv_upload_id} not found")
+        return {'status': 'error', 'message': 'CSV upload not found'}
+    
+    import_csv_upload(csv_upload)
+    
+    logger.info(f"CSV upload {csv_upload_id} {csv_upload.status}: {csv_upload.successful_imports} imported")
+    return {
+        'status': csv_upload.status,
+        'successful_imports': csv_upload.successful_imports,
+        'failed_imports': csv_upload.failed_imports,
+    }
@@ -4,13 +4,16 @@ Template-based views for the calls app frontend.
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Count, Q
-from django.utils import timezone
-from .models import Contact, Call, BatchCall, CSVUpload, CallLog
+from django.core.paginator import Paginator
+from django.db.models import Count, Q, Sum
+from .models import Contact, Call, BatchCall, CSVUpload
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Calls shown per page on the calls history page
+CALLS_PAGE_SIZE = 50
+
 
 @login_required
 def dashboard_view(request):
@@ -19,14 +22,17 @@ def dashboard_view(request):
     
     # Calculate statistics
     total_contacts = Contact.objects.filter(user=user).count()
-    total_calls = Call.objects.filter(user=user).count()
     total_batches = BatchCall.objects.filter(user=user).count()
     
-    completed_calls = Call.objects.filter(user=user, status='completed').count()
-    success_rate = round((completed_calls / total_calls * 100) if total_calls > 0 else 0, 1)
+    call_stats = Call.objects.filter(user=user).aggregate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(status='completed')),
+    )
+    total_calls = call_stats['total']
+    success_rate = round((call_stats['completed'] / total_calls * 100) if total_calls > 0 else 0, 1)
     
     # Recent activity
-    recent_calls = Call.objects.filter(user=user).order_by('-created_at')[:5]
+    recent_calls = Call.objects.filter(user=user).defer('transcript', 'analysis', 'config').order_by('-created_at')[:5]
     recent_batches = BatchCall.objects.filter(user=user).order_by('-created_at')[:5]
     
     context = {
@@ -49,14 +55,6 @@ def make_call_view(request):
     if request.method == 'POST':
         # Handle form submission
         try:
-            import sys
-            import os
-            from django.conf import settings
-            
-            # Import BlandClient from utils
-            sys.path.insert(0, str(settings.BASE_DIR.parent))
-            from utils import BlandClient, BlandApiError
-            
             phone_number = request.POST.get('phone_number')
             task = request.POST.get('task')
             contact_id = request.POST.get('contact_id')
@@ -65,7 +63,7 @@ def make_call_view(request):
             max_duration = request.POST.get('max_duration')
             record = request.POST.get('record') == 'on'
             
-            # Create Call record
+            # Create Call record; a worker sends it to Bland AI
             call = Call.objects.create(
                 user=request.user,
                 phone_number=phone_number,
@@ -74,58 +72,18 @@ def make_call_view(request):
                 model=model,
                 max_duration=max_duration,
                 record=record,
-                status='initiated',
-                started_at=timezone.now()
+                status='queued',
             )
             
-            # Call Bland API directly (no Celery for single calls)
-            client = BlandClient()
-            
-            call_params = {
-                'phone_number': phone_number,
-                'task': task,
-                'record': record,
-            }
-            
-            if voice:
-                call_params['voice'] = voice
-            if model:
-                call_params['model'] = model
-            if max_duration:
-                call_params['max_duration'] = max_duration
+            # Trigger Celery task so the request does not wait on the Bland API
+            from .tasks import process_single_call
+            process_single_call.delay(str(call.id))
             
-            # Send the call immediately
-            response = client.send_call(**call_params)
-            
-            # Update call with Bland AI response
-            call.bland_call_id = response.get('call_id')
-            call.status = 'in_progress'
-            call.save()
-            
-            # Log success
-            CallLog.objects.create(
-                call=call,
-                event_type='call_initiated',
-                message='Call successfully initiated with Bland AI',
-                data=response
-            )
-            
-            messages.success(request, f'Call initiated successfully! Call ID: {call.bland_call_id}')
-            return redirect('calls_list')
-            
-        except BlandApiError as e:
-            call.status = 'failed'
-            call.error_message = str(e)
-            call.save()
-            messages.error(request, f'Bland AI Error: {str(e)}')
+            messages.success(request, 'Call queued successfully! It will start in a moment.')
             return redirect('calls_list')
             
         except Exception as e:
-            if 'call' in locals():
-                call.status = 'failed'
-                call.error_message = str(e)
-                call.save()
-            messages.error(request, f'Error initiating call: {str(e)}')
+            messages.error(request, f'Error creating call: {str(e)}')
     
     # GET request - check for contact_id or phone in query params
     context = {}
@@ -153,9 +111,37 @@ def contacts_list_view(request):
 
 @login_required
 def calls_list_view(request):
-    """List all calls."""
-    calls = Call.objects.filter(user=request.user).select_related('contact').order_by('-created_at')
-    return render(request, 'calls/calls_list.html', {'calls': calls})
+    """List all calls, filtered by ?status= and a phone number search in ?q=."""
+    status_filter = request.GET.get('status', '').strip()
+    phone_search = request.GET.get('q', '').strip()
+    
+    # The template reads contact.name but no other relation; analysis and config are never shown
+    calls = (
+        Call.objects.filter(user=request.user)
+        .select_related('contact')
+        .defer('analysis', 'config')
+        .order_by('-created_at')
+    )
+    # Filtered before paginating so the filters cover every page, not just the current one
+    if status_filter:
+        calls = calls.filter(status=status_filter)
+    if phone_search:
+        calls = calls.filter(phone_number__icontains=phone_search)
+    page_obj = Paginator(calls, CALLS_PAGE_SIZE).get_page(request.GET.get('page'))
+    
+    # Carried through the page links so paging keeps the filters
+    filter_query = request.GET.copy()
+    filter_query.pop('page', None)
+    
+    context = {
+        'calls': page_obj,
+        'page_obj': page_obj,
+        'status_choices': Call.STATUS_CHOICES,
+        'status_filter': status_filter,
+        'phone_search': phone_search,
+        'filter_query': filter_query.urlencode(),
+    }
+    return render(request, 'calls/calls_list.html', context)
 
 
 @login_required
@@ -171,30 +157,32 @@ def batch_detail_view(request, batch_id):
     from django.shortcuts import get_object_or_404
     
     batch = get_object_or_404(BatchCall, id=batch_id, user=request.user)
-    calls = Call.objects.filter(batch=batch).select_related('contact').order_by('created_at')
-    
-    # Calculate statistics
-    total_calls = calls.count()
-    completed_calls = calls.filter(status='completed').count()
-    in_progress_calls = calls.filter(status='in_progress').count()
-    failed_calls = calls.filter(status='failed').count()
-    queued_calls = calls.filter(status='queued').count()
+    calls = (
+        Call.objects.filter(batch=batch)
+        .select_related('contact')
+        .defer('transcript', 'analysis', 'config')
+        .order_by('created_at')
+    )
     
-    # Calculate total duration
-    total_duration = 0
-    for call in calls:
-        if call.duration:
-            total_duration += call.duration
+    # Calculate statistics and total duration in one query
+    stats = calls.aggregate(
+        total_calls=Count('id'),
+        completed_calls=Count('id', filter=Q(status='completed')),
+        in_progress_calls=Count('id', filter=Q(status='in_progress')),
+        failed_calls=Count('id', filter=Q(status='failed')),
+        queued_calls=Count('id', filter=Q(status='queued')),
+        total_duration=Sum('duration'),
+    )
     
     context = {
         'batch': batch,
         'calls': calls,
-        'total_calls': total_calls,
-        'completed_calls': completed_calls,
-        'in_progress_calls': in_progress_calls,
-        'failed_calls': failed_calls,
-        'queued_calls': queued_calls,
-        'total_duration': total_duration,
+        'total_calls': stats['total_calls'],
+        'completed_calls': stats['completed_calls'],
+        'in_progress_calls': stats['in_progress_calls'],
+        'failed_calls': stats['failed_calls'],
+        'queued_calls': stats['queued_calls'],
+        'total_duration': stats['total_duration'] or 0,
     }
     
     return render(request, 'calls/batch_detail.html', context)
@@ -222,22 +210,25 @@ def create_campaign_view(request):
             )
             
             # Create Call objects for each contact
-            contacts = Contact.objects.filter(id__in=contact_ids, user=request.user)
+            contacts = Contact.objects.filter(
+                id__in=contact_ids, user=request.user
+            ).values_list('id', 'phone_number')
             calls = []
-            for contact in contacts:
+            for contact_id, phone_number in contacts:
                 # Determine the script for this contact
                 if script_mode == 'different':
                     # Get per-contact script
-                    contact_script_key = f'contact_script_{contact.id}'
-                    contact_script = request.POST.get(contact_script_key, batch.base_prompt)
+                    contact_script_key = f'contact_script_{contact_id}'
+                    contact_script = request.POST.get(contact_script_key) or None
                 else:
-                    contact_script = batch.base_prompt
+                    # Empty task: the call uses the batch's base_prompt
+                    contact_script = None
                 
                 calls.append(Call(
                     user=request.user,
-                    contact=contact,
+                    contact_id=contact_id,
                     batch=batch,
-                    phone_number=contact.phone_number,
+                    phone_number=phone_number,
                     task=contact_script,  # Use per-contact script
                     voice=batch.voice,
                     model=batch.model,
@@ -245,7 +236,7 @@ def create_campaign_view(request):
                     record=batch.record,
                 ))
             
-            Call.objects.bulk_create(calls)
+            Call.objects.bulk_create(calls, batch_size=1000)
             
             # Trigger Celery task to process batch calls sequentially
             from .tasks import process_batch_call
@@ -273,7 +264,10 @@ def import_csv_view(request):
                 filename=csv_file.name
             )
             
-            # Process CSV (this is handled in the views.py CSVUploadViewSet)
+            # Trigger Celery task to import the contacts
+            from .tasks import process_csv_upload
+            process_csv_upload.delay(str(csv_upload.id))
+            
             messages.success(request, 'CSV file uploaded successfully! Processing contacts...')
             return redirect('contacts_list')
         except Exception as e:
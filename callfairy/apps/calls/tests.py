@@ -1,7 +1,155 @@
 """
 Tests for calls app.
-TODO: Add comprehensive tests for models, serializers, views, and tasks.
 """
-from django.test import TestCase
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.urls import reverse
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status, serializers
+from django.contrib.auth import get_user_model
+from unittest.mock import patch
+from callfairy.apps.calls.csv_import import import_csv_upload
+from callfairy.apps.calls.models import Contact, CSVUpload
+from callfairy.apps.calls.serializers import validate_e164
+
+
+User = get_user_model()
+
+# Uploaded CSVs are written here instead of the project's media directory
+TEST_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+
+class ValidateE164Tests(TestCase):
+    def test_accepts_e164_numbers(self):
+        for value in ('+12223334444', '+447911123456', '+1234567'):
+            self.assertEqual(validate_e164(value), value)
+
+    def test_rejects_non_e164_numbers(self):
+        invalid = (
+            '12223334444',        # no leading +
+            '+02223334444',       # country code cannot start with 0
+            '+123456',            # too short
+            '+1234567890123456',  # more than 15 digits
+            '+1 222 333 4444',    # separators
+            '+12223334444x',      # trailing junk
+            '',
+        )
+        for value in invalid:
+            with self.assertRaises(serializers.ValidationError, msg=value):
+                validate_e164(value)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class CSVImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='importer@example.com', password='StrongPass!234', name='Importer')
+
+    def _upload(self, content):
+        return CSVUpload.objects.create(
+            user=self.user,
+            file=ContentFile(content.encode('utf-8'), name='contacts.csv'),
+            filename='contacts.csv',
+        )
+
+    def test_name_column_wins_over_contact_column(self):
+        # 'name' and 'contact' both map to the name field; the earlier variation wins
+        csv_upload = self._upload(
+            'contact,name,phone\n'
+            'Acme Corp,Jane Doe,+12223334444\n'
+        )
+        import_csv_upload(csv_upload)
+
+        csv_upload.refresh_from_db()
+        self.assertEqual(csv_upload.status, 'completed')
+        self.assertEqual(csv_upload.successful_imports, 1)
+        contact = Contact.objects.get(user=self.user)
+        self.assertEqual(contact.name, 'Jane Doe')
+        self.assertEqual(contact.phone_number, '+12223334444')
+        # Unmapped columns are kept as metadata
+        self.assertEqual(contact.metadata, {'contact': 'Acme Corp'})
+
+    def test_invalid_rows_are_logged_and_skipped(self):
+        csv_upload = self._upload(
+            'name,phone_number,email\n'
+            'Valid,+12223334444,valid@example.com\n'
+            ',+12223334445,\n'
+            'No Plus,12223334446,\n'
+            'Too Short,+12,\n'
+        )
+        import_csv_upload(csv_upload)
+
+        csv_upload.refresh_from_db()
+        self.assertEqual(csv_upload.status, 'completed')
+        self.assertEqual(csv_upload.total_rows, 4)
+        self.assertEqual(csv_upload.successful_imports, 1)
+        self.assertEqual(csv_upload.failed_imports, 3)
+        self.assertEqual([error['row'] for error in csv_upload.error_log], [2, 3, 4])
+        self.assertEqual(
+            list(Contact.objects.filter(user=self.user).values_list('name', 'email')),
+            [('Valid', 'valid@example.com')],
+        )
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class CallsAPITests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='caller@example.com', password='StrongPass!234', name='Caller')
+        self.client.force_authenticate(user=self.user)
+        self.csv_upload_list_url = reverse('csv-upload-list')
+        self.bulk_create_url = reverse('contact-bulk-create')
+
+    @patch('callfairy.apps.calls.views.process_csv_upload.delay')
+    def test_csv_upload_returns_202_with_status_url(self, mock_delay):
+        csv_file = SimpleUploadedFile('contacts.csv', b'name,phone\nJane,+12223334444\n', content_type='text/csv')
+        resp = self.client.post(self.csv_upload_list_url, {'csv_file': csv_file}, format='multipart')
+        self.assertEqual(resp.status_code, status.HTTP_202_ACCEPTED)
+
+        csv_upload = CSVUpload.objects.get(user=self.user)
+        self.assertEqual(resp.data['id'], str(csv_upload.id))
+        self.assertEqual(resp.data['status'], 'pending')
+        self.assertEqual(
+            resp.data['status_url'],
+            'http://testserver' + reverse('csv-upload-detail', args=[csv_upload.id]),
+        )
+        mock_delay.assert_called_once_with(str(csv_upload.id))
+
+        # The status URL serves the upload
+        detail = self.client.get(resp.data['status_url'])
+        self.assertEqual(detail.status_code, status.HTTP_200_OK)
+
+    def _bulk_payload(self):
+        return {'contacts': [
+            {'name': 'Jane Doe', 'phone_number': '+12223334444'},
+            {'name': 'John Roe', 'phone_number': '+12223334445'},
+        ]}
+
+    def test_bulk_create_returns_ids(self):
+        resp = self.client.post(self.bulk_create_url, self._bulk_payload(), format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data['count'], 2)
+        self.assertNotIn('contacts', resp.data)
+        self.assertCountEqual(
+            resp.data['ids'],
+            Contact.objects.filter(user=self.user).values_list('id', flat=True),
+        )
+
+    def test_bulk_create_expand_returns_contacts(self):
+        resp = self.client.post(f'{self.bulk_create_url}?expand=true', self._bulk_payload(), format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data['count'], 2)
+        self.assertEqual([c['name'] for c in resp.data['contacts']], ['Jane Doe', 'John Roe'])
+        self.assertEqual([c['id'] for c in resp.data['contacts']], [str(i) for i in resp.data['ids']])
+
+    def test_bulk_create_rejects_invalid_phone(self):
+        payload = {'contacts': [{'name': 'Bad', 'phone_number': '12223334444'}]}
+        resp = self.client.post(self.bulk_create_url, payload, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Contact.objects.filter(user=self.user).exists())
@@ -4,21 +4,47 @@ Views for Bland AI call management API.
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.pagination import CursorPagination
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.utils import timezone
+from rest_framework.reverse import reverse
+from django.db.models import F, Prefetch
 import csv
-import io
+import logging
 
 from .models import Contact, Call, BatchCall, CallLog, CSVUpload
 from .serializers import (
-    ContactSerializer, CallSerializer, BatchCallSerializer,
+    ContactSerializer, CallSerializer, CallListSerializer, BatchCallSerializer,
+    BatchCallListSerializer,
     CallLogSerializer, CSVUploadSerializer, CallCreateSerializer,
     BatchCallCreateSerializer, ContactBulkCreateSerializer,
     CallStatusUpdateSerializer
 )
-from .tasks import process_single_call, process_batch_call, update_call_status, update_batch_status
+from .csv_import import E164_RE, get_mapped_value, map_headers, open_text
+from .tasks import (
+    process_single_call, process_batch_call, update_call_status, update_batch_status,
+    process_csv_upload
+)
+
+logger = logging.getLogger(__name__)
+
+
+def serializable_calls(queryset):
+    """Annotate the contact name and batch prompt CallSerializer outputs, instead of loading those rows."""
+    return queryset.annotate(contact_name=F('contact__name'), batch_prompt=F('batch__base_prompt'))
+
+
+class CallLogCursorPagination(CursorPagination):
+    """Newest-first cursor pages over a call's logs; no OFFSET scans on long histories."""
+    ordering = ('-created_at', '-id')
+    page_size = 100
+
+
+def listable_calls(queryset):
+    """Like serializable_calls, also skipping the large columns CallListSerializer leaves out."""
+    return serializable_calls(queryset).defer('transcript', 'analysis', 'config')
 
 
 class ContactViewSet(viewsets.ModelViewSet):
@@ -47,25 +73,25 @@ class ContactViewSet(viewsets.ModelViewSet):
         """
         Bulk create multiple contacts.
         
-        POST /api/v1/calls/contacts/bulk_create/
+        POST /api/v1/calls/contacts/bulk_create/?expand=true
         Body: {"contacts": [{"name": "...", "phone_number": "..."}, ...]}
+        
+        Returns the new contact ids; pass expand=true to get the
+        serialized contacts as well.
         """
         serializer = ContactBulkCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        created_contacts = serializer.save(user=request.user)
         
-        contacts = []
-        for contact_data in serializer.validated_data['contacts']:
-            contacts.append(Contact(user=request.user, **contact_data))
-        
-        created_contacts = Contact.objects.bulk_create(contacts)
+        data = {
+            'message': f'{len(created_contacts)} contacts created successfully',
+            'count': len(created_contacts),
+            'ids': [contact.id for contact in created_contacts],
+        }
+        if request.query_params.get('expand', 'false').lower() == 'true':
+            data['contacts'] = ContactSerializer(created_contacts, many=True).data
         
-        return Response(
-            {
-                'message': f'{len(created_contacts)} contacts created successfully',
-                'contacts': ContactSerializer(created_contacts, many=True).data
-            },
-            status=status.HTTP_201_CREATED
-        )
+        return Response(data, status=status.HTTP_201_CREATED)
     
     @action(detail=False, methods=['delete'])
     def bulk_delete(self, request):
@@ -109,12 +135,20 @@ class CallViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filter calls by current user."""
-        return Call.objects.filter(user=self.request.user).select_related('contact', 'batch')
+        calls = Call.objects.filter(user=self.request.user)
+        if self.action == 'list':
+            return listable_calls(calls)
+        if self.action == 'logs':
+            # The logs action only checks the call exists and belongs to the user
+            return calls.only('id')
+        return serializable_calls(calls)
     
     def get_serializer_class(self):
-        """Use different serializer for creation."""
+        """Use different serializers for creation and listing."""
         if self.action == 'create':
             return CallCreateSerializer
+        if self.action == 'list':
+            return CallListSerializer
         return CallSerializer
     
     def perform_create(self, serializer):
@@ -126,11 +160,20 @@ class CallViewSet(viewsets.ModelViewSet):
         
         return call
     
+    def perform_update(self, serializer):
+        """Save the call, refreshing the contact_name annotation if the contact changed."""
+        call = serializer.save()
+        # The validated contact is already loaded; the annotation still holds the old name
+        if 'contact' in serializer.validated_data:
+            call.contact_name = call.contact.name if call.contact else None
+    
     def create(self, request, *args, **kwargs):
         """Create a new call and initiate it."""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         call = self.perform_create(serializer)
+        # The validated contact is already loaded; mirror the queryset annotation
+        call.contact_name = call.contact.name if call.contact else None
         
         return Response(
             {
@@ -168,12 +211,13 @@ class CallViewSet(viewsets.ModelViewSet):
         """
         Get logs for a specific call.
         
-        GET /api/v1/calls/calls/{id}/logs/
+        GET /api/v1/calls/calls/{id}/logs/?cursor=...
         """
         call = self.get_object()
-        logs = call.logs.all()
-        serializer = CallLogSerializer(logs, many=True)
-        return Response(serializer.data)
+        paginator = CallLogCursorPagination()
+        page = paginator.paginate_queryset(CallLog.objects.filter(call=call), request, view=self)
+        serializer = CallLogSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class BatchCallViewSet(viewsets.ModelViewSet):
@@ -192,12 +236,22 @@ class BatchCallViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filter batches by current user."""
-        return BatchCall.objects.filter(user=self.request.user).prefetch_related('calls')
+        batches = BatchCall.objects.filter(user=self.request.user)
+        # Only the nested calls need the prefetch; calls_count is counted from it
+        if self.action in ('calls', 'refresh_status'):
+            return batches
+        if self.action == 'list':
+            calls = listable_calls(Call.objects.all())
+        else:
+            calls = serializable_calls(Call.objects.all())
+        return batches.prefetch_related(Prefetch('calls', queryset=calls))
     
     def get_serializer_class(self):
-        """Use different serializer for creation."""
+        """Use different serializer for creation and list."""
         if self.action == 'create':
             return BatchCallCreateSerializer
+        if self.action == 'list':
+            return BatchCallListSerializer
         return BatchCallSerializer
     
     def create(self, request, *args, **kwargs):
@@ -229,34 +283,38 @@ class BatchCallViewSet(viewsets.ModelViewSet):
             config=serializer.validated_data.get('config', {}),
         )
         
-        # Create Call objects for each contact
+        # Create Call objects for each contact; only the contact columns copied onto calls are fetched
         contacts = Contact.objects.filter(
             id__in=serializer.validated_data['contact_ids'],
             user=request.user
-        )
+        ).values_list('id', 'phone_number', 'metadata')
         
-        calls = []
-        for contact in contacts:
-            calls.append(Call(
+        calls = [
+            Call(
                 user=request.user,
-                contact=contact,
+                contact_id=contact_id,
                 batch=batch,
-                phone_number=contact.phone_number,
-                task=batch.base_prompt,
+                phone_number=phone_number,
                 voice=batch.voice,
                 model=batch.model,
                 max_duration=batch.max_duration,
                 record=batch.record,
                 wait_for_greeting=batch.wait_for_greeting,
-                metadata=contact.metadata,
+                metadata=metadata,
                 config=batch.config,
-            ))
+            )
+            for contact_id, phone_number, metadata in contacts
+        ]
         
-        Call.objects.bulk_create(calls)
+        Call.objects.bulk_create(calls, batch_size=1000)
         
         # Trigger async task to process the batch
         process_batch_call.delay(str(batch.id))
         
+        # Re-read through get_queryset() so the nested calls and calls_count
+        # are served from one prefetch instead of per-call queries
+        batch = self.get_queryset().get(pk=batch.pk)
+        
         return Response(
             {
                 'message': 'Batch call campaign created and queued',
@@ -296,15 +354,15 @@ class BatchCallViewSet(viewsets.ModelViewSet):
         GET /api/v1/calls/batches/{id}/calls/
         """
         batch = self.get_object()
-        calls = batch.calls.all()
+        calls = listable_calls(Call.objects.filter(batch=batch))
         
         # Apply pagination
         page = self.paginate_queryset(calls)
         if page is not None:
-            serializer = CallSerializer(page, many=True)
+            serializer = CallListSerializer(page, many=True)
             return self.get_paginated_response(serializer.data)
         
-        serializer = CallSerializer(calls, many=True)
+        serializer = CallListSerializer(calls, many=True)
         return Response(serializer.data)
 
 
@@ -321,25 +379,8 @@ class CSVUploadViewSet(viewsets.ModelViewSet):
     filterset_fields = ['status']
     ordering_fields = ['created_at']
     ordering = ['-created_at']
-    
-    # Add parsers for multipart form data
-    from rest_framework.parsers import MultiPartParser, FormParser
     parser_classes = [MultiPartParser, FormParser]
     
-    # Flexible column name mappings
-    COLUMN_MAPPINGS = {
-        'name': ['name', 'full_name', 'fullname', 'customer_name', 'contact_name', 
-                 'full name', 'customer name', 'contact name', 'client_name', 
-                 'client name', 'person', 'contact', 'first_name', 'firstname'],
-        'phone_number': ['phone_number', 'phone', 'phonenumber', 'mobile', 'cell',
-                        'phone number', 'mobile_number', 'mobile number', 'cell_number',
-                        'cell number', 'telephone', 'tel', 'contact_number', 'number',
-                        'phone_no', 'mobile_no'],
-        'email': ['email', 'email_address', 'email address', 'e-mail', 'e_mail',
-                  'mail', 'contact_email', 'contact email'],
-        'tags': ['tags', 'tag', 'category', 'categories', 'label', 'labels', 'type'],
-    }
-    
     def get_queryset(self):
         """Filter uploads by current user."""
         return CSVUpload.objects.filter(user=self.request.user)
@@ -361,8 +402,7 @@ class CSVUploadViewSet(viewsets.ModelViewSet):
             csv_file = django_request.FILES.get('csv_file') or django_request.FILES.get('file')
             
             if not csv_file:
-                print("ERROR: No CSV file in request.FILES")
-                print(f"request.FILES keys: {list(request.FILES.keys())}")
+                logger.debug("No CSV file in request.FILES (keys: %s)", list(request.FILES.keys()))
                 return Response(
                     {'error': 'No CSV file provided'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -376,7 +416,7 @@ class CSVUploadViewSet(viewsets.ModelViewSet):
                 )
             
             try:
-                print(f"Creating CSVUpload for file: {csv_file.name}, user: {request.user}")
+                logger.debug("Creating CSVUpload for file: %s, user: %s", csv_file.name, request.user)
                 
                 # Create CSV upload record directly
                 csv_upload = CSVUpload.objects.create(
@@ -386,32 +426,22 @@ class CSVUploadViewSet(viewsets.ModelViewSet):
                     status='pending'
                 )
                 
-                print(f"CSVUpload created with ID: {csv_upload.id}")
-                
-                # Process the CSV file
-                self._process_csv(csv_upload)
+                logger.debug("CSVUpload created with ID: %s", csv_upload.id)
                 
-                # Refresh to get updated data
-                csv_upload.refresh_from_db()
+                # Trigger Celery task; the client polls the upload for results
+                process_csv_upload.delay(str(csv_upload.id))
                 
-                print(f"Processing complete. Status: {csv_upload.status}, Imports: {csv_upload.successful_imports}")
-                
-                # Return custom response with import results
                 return Response(
                     {
-                        'message': 'Import completed successfully' if csv_upload.status == 'completed' else 'Import completed with errors',
-                        'successful_imports': csv_upload.successful_imports or 0,
-                        'failed_imports': csv_upload.failed_imports or 0,
-                        'total_rows': csv_upload.total_rows or 0,
+                        'message': 'Import started',
+                        'id': str(csv_upload.id),
                         'status': csv_upload.status,
-                        'errors': csv_upload.error_log[:5] if csv_upload.error_log else []
+                        'status_url': reverse('csv-upload-detail', args=[csv_upload.id], request=request),
                     },
-                    status=status.HTTP_201_CREATED
+                    status=status.HTTP_202_ACCEPTED
                 )
             except Exception as e:
-                import traceback
-                error_details = traceback.format_exc()
-                print(f"CSV Import Error: {error_details}")  # Log full error to console
+                logger.exception("CSV import failed")
                 return Response(
                     {'error': f'Import failed: {str(e)}'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -424,8 +454,8 @@ class CSVUploadViewSet(viewsets.ModelViewSet):
             filename=serializer.validated_data['file'].name
         )
         
-        # Process the CSV file
-        self._process_csv(csv_upload)
+        # Trigger Celery task to process the CSV file
+        process_csv_upload.delay(str(csv_upload.id))
     
     def _validate_csv(self, request):
         """Validate CSV without importing."""
@@ -437,10 +467,8 @@ class CSVUploadViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            # Read CSV file - seek to beginning first
-            csv_file.seek(0)
-            file_content = csv_file.read().decode('utf-8')
-            csv_reader = csv.DictReader(io.StringIO(file_content))
+            # Stream the CSV instead of decoding it into memory at once
+            csv_reader = csv.DictReader(open_text(csv_file))
             
             total_rows = 0
             valid_rows = 0
@@ -449,7 +477,7 @@ class CSVUploadViewSet(viewsets.ModelViewSet):
             
             # Get column mappings
             headers = csv_reader.fieldnames or []
-            mapped_headers = self._map_headers(headers)
+            mapped_headers = map_headers(headers)
             
             if not mapped_headers.get('name'):
                 return Response(
@@ -463,32 +491,32 @@ class CSVUploadViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
+            name_col = mapped_headers['name']
+            phone_col = mapped_headers['phone_number']
+            
             # Validate each row
             for row_num, row in enumerate(csv_reader, start=1):
                 total_rows += 1
                 
-                try:
-                    # Extract data using flexible mapping
-                    name = self._get_mapped_value(row, mapped_headers.get('name', []))
-                    phone_number = self._get_mapped_value(row, mapped_headers.get('phone_number', []))
-                    
-                    # Validate required fields
-                    if not name or not name.strip():
-                        raise ValueError(f"Row {row_num}: Name is required")
-                    
-                    if not phone_number or not phone_number.strip():
-                        raise ValueError(f"Row {row_num}: Phone number is required")
-                    
-                    # Validate phone number format
-                    phone_number = phone_number.strip()
-                    if not phone_number.startswith('+'):
-                        raise ValueError(f"Row {row_num}: Phone number must start with + (E.164 format)")
-                    
-                    valid_rows += 1
-                    
-                except Exception as e:
+                # Extract data using flexible mapping (values come back stripped)
+                name = get_mapped_value(row, name_col)
+                phone_number = get_mapped_value(row, phone_col)
+                
+                # Validate required fields and phone number format
+                if not name:
+                    error = f"Row {row_num}: Name is required"
+                elif not phone_number:
+                    error = f"Row {row_num}: Phone number is required"
+                elif not E164_RE.fullmatch(phone_number):
+                    error = f"Row {row_num}: Phone number must be in E.164 format (e.g., +12223334444)"
+                else:
+                    error = None
+                
+                if error:
                     invalid_rows += 1
-                    errors.append(str(e))
+                    errors.append(error)
+                else:
+                    valid_rows += 1
             
             return Response({
                 'total_rows': total_rows,
@@ -503,119 +531,3 @@ class CSVUploadViewSet(viewsets.ModelViewSet):
                 {'error': f'Failed to validate CSV: {str(e)}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-    
-    def _map_headers(self, headers):
-        """Map CSV headers to standard field names."""
-        mapped = {}
-        headers_lower = [h.lower().strip() for h in headers]
-        
-        for field, variations in self.COLUMN_MAPPINGS.items():
-            for variation in variations:
-                if variation.lower() in headers_lower:
-                    idx = headers_lower.index(variation.lower())
-                    original_header = headers[idx]
-                    mapped[field] = [original_header]
-                    break
-        
-        return mapped
-    
-    def _get_mapped_value(self, row, header_options):
-        """Get value from row using header options."""
-        for header in header_options:
-            if header in row:
-                value = row[header]
-                if value and str(value).strip():
-                    return str(value).strip()
-        return ''
-    
-    def _process_csv(self, csv_upload):
-        """Process uploaded CSV file and create contacts with flexible header mapping."""
-        csv_upload.status = 'processing'
-        csv_upload.save()
-        
-        errors = []
-        successful_imports = 0
-        failed_imports = 0
-        
-        try:
-            # Read CSV file - seek to beginning first
-            csv_upload.file.seek(0)
-            file_content = csv_upload.file.read().decode('utf-8')
-            csv_reader = csv.DictReader(io.StringIO(file_content))
-            
-            # Map headers
-            headers = csv_reader.fieldnames or []
-            mapped_headers = self._map_headers(headers)
-            
-            total_rows = 0
-            contacts_to_create = []
-            
-            for row_num, row in enumerate(csv_reader, start=1):
-                total_rows += 1
-                
-                try:
-                    # Extract data from CSV using flexible mapping
-                    name = self._get_mapped_value(row, mapped_headers.get('name', []))
-                    phone_number = self._get_mapped_value(row, mapped_headers.get('phone_number', []))
-                    email = self._get_mapped_value(row, mapped_headers.get('email', []))
-                    tags_str = self._get_mapped_value(row, mapped_headers.get('tags', []))
-                    
-                    # Validate required fields
-                    if not name or not phone_number:
-                        raise ValueError("Name and phone_number are required")
-                    
-                    # Validate phone number format
-                    if not phone_number.startswith('+'):
-                        raise ValueError("Phone number must be in E.164 format (e.g., +12223334444)")
-                    
-                    # Extract metadata (any additional columns not mapped)
-                    metadata = {}
-                    mapped_keys = []
-                    for field_mappings in mapped_headers.values():
-                        mapped_keys.extend(field_mappings)
-                    
-                    for key, value in row.items():
-                        if key not in mapped_keys and value:
-                            metadata[key] = value
-                    
-                    # Extract tags if present
-                    tags = []
-                    if tags_str:
-                        tags = [tag.strip() for tag in tags_str.split(',') if tag.strip()]
-                    
-                    contacts_to_create.append(Contact(
-                        user=csv_upload.user,
-                        name=name,
-                        phone_number=phone_number,
-                        email=email if email else None,
-                        metadata=metadata,
-                        tags=tags
-                    ))
-                    
-                    successful_imports += 1
-                    
-                except Exception as e:
-                    failed_imports += 1
-                    errors.append({
-                        'row': row_num,
-                        'error': str(e),
-                        'data': row
-                    })
-            
-            # Bulk create contacts
-            if contacts_to_create:
-                Contact.objects.bulk_create(contacts_to_create)
-            
-            # Update CSV upload record
-            csv_upload.status = 'completed'
-            csv_upload.total_rows = total_rows
-            csv_upload.successful_imports = successful_imports
-            csv_upload.failed_imports = failed_imports
-            csv_upload.error_log = errors
-            csv_upload.processed_at = timezone.now()
-            csv_upload.save()
-            
-        except Exception as e:
-            csv_upload.status = 'failed'
-            csv_upload.error_log = [{'error': f'Failed to process CSV: {str(e)}'}]
-            csv_upload.save()
@@ -121,6 +121,13 @@ DATABASES = {
         'PASSWORD': env('POSTGRES_PASSWORD'),
         'HOST': 'db',
         'PORT': '5432',
+        # Keep connections open between requests/tasks. Leave at 0 under ASGI
+        # (daphne), where each request thread would hold its own connection;
+        # pool with pgbouncer there instead.
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=0),
+        'CONN_HEALTH_CHECKS': True,
+        # Required behind pgbouncer in transaction pooling mode
+        'DISABLE_SERVER_SIDE_CURSORS': env.bool('DB_DISABLE_SERVER_SIDE_CURSORS', default=False),
     }
 }
 
@@ -134,6 +141,19 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Cache
+# Shared by every web and worker process, so locks and invalidations made in
+# one process are seen by the others (the per-process LocMem default is not).
+# Point CACHE_REDIS_URL at its own Redis database to keep cache.clear() away
+# from the Celery broker's keys.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': env('CACHE_REDIS_URL', default=env('REDIS_URL')),
+        'KEY_PREFIX': 'callfairy',
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -278,6 +298,19 @@ RAZORPAY_KEY_ID = env('RAZORPAY_KEY_ID')
 RAZORPAY_KEY_SECRET = env('RAZORPAY_KEY_SECRET')
 RAZORPAY_WEBHOOK_SECRET = env('RAZORPAY_WEBHOOK_SECRET')
 
+# Rows per INSERT statement for bulk contact imports
+CONTACT_BULK_BATCH_SIZE = env.int('CONTACT_BULK_BATCH_SIZE', default=1000)
+
+# Bland AI settings
+# Seconds between batch call submissions (sets the submit task's Celery rate limit)
+BLAND_BATCH_CALL_INTERVAL = env.int('BLAND_BATCH_CALL_INTERVAL', default=70)
+# Seconds between status polls of calls still running on Bland AI
+BLAND_STATUS_POLL_INTERVAL = env.int('BLAND_STATUS_POLL_INTERVAL', default=60)
+# Minutes a call may run when neither it nor its batch sets max_duration
+BLAND_DEFAULT_MAX_DURATION = env.int('BLAND_DEFAULT_MAX_DURATION', default=30)
+# Minutes past a call's max duration after which it is no longer polled
+BLAND_STATUS_POLL_GRACE = env.int('BLAND_STATUS_POLL_GRACE', default=10)
+
 # CELERY settings
 CELERY_BROKER_URL = env('REDIS_URL')
 CELERY_RESULT_BACKEND = 'django-db'
@@ -289,6 +322,21 @@ CELERY_TIMEZONE = 'UTC'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 CELERY_RESULT_EXTENDED = True
+# Reserve one task per worker process so a long CSV import or Bland request
+# does not hold queued tasks that idle processes could run
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Batch submissions are paced by submit_batch_call's rate_limit, which Celery
+# enforces per worker; they get their own queue, consumed by a single-process
+# worker (-Q bland_batch -c 1), so a paced batch never holds up other tasks
+CELERY_TASK_ROUTES = {
+    'callfairy.apps.calls.tasks.submit_batch_call': {'queue': 'bland_batch'},
+}
 
 # Celery Beat settings for periodic tasks
-CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
\ No newline at end of file
+CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+CELERY_BEAT_SCHEDULE = {
+    'poll-active-calls': {
+        'task': 'callfairy.apps.calls.tasks.poll_active_calls',
+        'schedule': BLAND_STATUS_POLL_INTERVAL,
+    },
+}
\ No newline at end of file
@@ -26,5 +26,11 @@ echo "Starting Celery Worker..."
 echo "To stop: Press Ctrl+C"
 echo ""
 
+# Paced Bland batch submissions get their own single-process worker so a
+# long campaign never holds up other tasks; stopped together with the main worker
+celery -A callfairy.core worker --loglevel=info -Q bland_batch -c 1 -n bland_batch@%h &
+BATCH_WORKER_PID=$!
+trap 'kill $BATCH_WORKER_PID 2>/dev/null' EXIT
+
 # Start Celery worker
-celery -A callfairy.core worker --loglevel=info
\ No newline at end of file
+celery -A callfairy.core worker --loglevel=info -O fair -Q celery
\ No newline at end of file
@@ -107,14 +107,13 @@ try:
     print(f"\n✓ Import Status Code: {response2.status_code}")
     print(f"✓ Response Data: {response2.data}")
     
-    if response2.status_code == 201:
-        print("\n✅ IMPORT SUCCESSFUL!")
-        print(f"   - Successful imports: {response2.data.get('successful_imports')}")
-        print(f"   - Failed imports: {response2.data.get('failed_imports')}")
-        print(f"   - Total rows: {response2.data.get('total_rows')}")
+    if response2.status_code == 202:
+        print("\n✅ IMPORT QUEUED!")
+        print(f"   - Upload ID: {response2.data.get('id')}")
+        print(f"   - Status URL: {response2.data.get('status_url')}")
         print(f"   - Status: {response2.data.get('status')}")
         
-        # Check if contacts were created
+        # Check if contacts were created (requires a running Celery worker)
         from callfairy.apps.calls.models import Contact
         contacts = Contact.objects.filter(user=user, name__startswith='Test User')
         print(f"\n✓ Contacts in database: {contacts.count()}")
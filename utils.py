@@ -8,7 +8,11 @@ Documentation: https://docs.bland.ai/welcome-to-bland
 """
 
 import os
+import socket
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
 from typing import Dict, List, Optional, Any, Union
 from enum import Enum
 
@@ -56,6 +60,29 @@ class HttpMethod(str, Enum):
     POST = "POST"
 
 
+# ============================================================================
+# Transport
+# ============================================================================
+
+# Batch calls are sent about a minute apart; TCP keepalive probes stop idle
+# pooled connections from being dropped between them
+KEEPALIVE_SOCKET_OPTIONS = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+if hasattr(socket, "TCP_KEEPIDLE"):
+    KEEPALIVE_SOCKET_OPTIONS += [
+        (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 30),
+        (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10),
+        (socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3),
+    ]
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections enable TCP keepalive."""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = HTTPConnection.default_socket_options + KEEPALIVE_SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+
 # ============================================================================
 # Main Client Class
 # ============================================================================
@@ -87,6 +114,13 @@ class BlandClient:
             )
         self.base_url = base_url.rstrip("/")
         self.session = requests.Session()
+        # Reuse connections across calls; only connection failures are retried,
+        # since nothing was sent yet and a repeated POST could place a call twice
+        self.session.mount("https://", KeepAliveAdapter(
+            pool_connections=4,
+            pool_maxsize=4,
+            max_retries=Retry(total=3, connect=3, read=0, status=0, backoff_factor=0.5),
+        ))
         self.session.headers.update({
             "Authorization": self.api_key,
             "Content-Type": "application/json"